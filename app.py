@@ -9,10 +9,12 @@ from urllib.parse import urlencode
 import time
 import polars as pl
 import traceback
-import pickle
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
 import gc
+import ingest
+import jobs
+import queries
+from panel_cache import PanelCache
 
 # ULTRA-PERFORMANCE CONFIG: Optimize Streamlit for maximum speed
 st.set_page_config(
@@ -155,71 +157,24 @@ def show_songs_in_most_playlists():
             st.info("No profile selected")
             return
             
-        profile_path = os.path.join(PROFILE_DIR, profile_name)
-        playlist_files = [f for f in os.listdir(profile_path) if 'Playlist' in f and f.endswith('.json')]
-        
-        if not playlist_files:
+        # Normalized at ingest; the group-by result is kept in the panel result cache
+        playlist_tracks_path = get_artifact_path(profile_name, 'playlist_tracks')
+        if not os.path.exists(playlist_tracks_path):
             st.info("No playlist files found for this profile.")
             return
-            
-        song_playlist_count = {}
-        song_details = {}
-        
-        # Process each playlist file
-        for playlist_file in playlist_files:
-            try:
-                with open(os.path.join(profile_path, playlist_file), 'r', encoding='utf-8') as f:
-                    playlist_data = json.load(f)
-                
-                if isinstance(playlist_data, dict) and 'playlists' in playlist_data:
-                    for playlist in playlist_data['playlists']:
-                        playlist_name = playlist.get('name', 'Unknown')
-                        items = playlist.get('items', [])
-                        
-                        for item in items:
-                            track = item.get('track', {})
-                            track_name = track.get('trackName', '').strip()
-                            artist_name = track.get('artistName', '').strip()
-                            
-                            if track_name and artist_name and track_name.lower() not in ['unknown', 'n/a', ''] and artist_name.lower() not in ['unknown', 'n/a', '']:
-                                # Create unique song identifier
-                                song_key = f"{track_name} - {artist_name}"
-                                
-                                # Count playlist appearances
-                                if song_key not in song_playlist_count:
-                                    song_playlist_count[song_key] = set()
-                                    song_details[song_key] = {
-                                        'trackName': track_name,
-                                        'artistName': artist_name
-                                    }
-                                
-                                song_playlist_count[song_key].add(playlist_name)
-            except Exception:
-                continue
         
-        # Convert to counts and create DataFrame
-        if not song_playlist_count:
-            st.info("No song data found in playlists")
-            return
-            
-        songs_data = []
-        for song_key, playlists in song_playlist_count.items():
-            if len(playlists) > 1:  # Only songs in multiple playlists
-                songs_data.append({
-                    'song': song_key,
-                    'trackName': song_details[song_key]['trackName'],
-                    'artistName': song_details[song_key]['artistName'],
-                    'playlistCount': len(playlists),
-                    'playlists': ', '.join(list(playlists)[:3]) + ('...' if len(playlists) > 3 else '')
-                })
+        top_songs = get_panel_cache().collect(
+            profile_name,
+            get_profile_fingerprint(profile_name),
+            {},
+            ['songs_in_most_playlists'],
+            lambda: {'songs_in_most_playlists': queries.playlist_membership_plan(pl.scan_parquet(playlist_tracks_path))},
+            queries.collect_plans,
+        )['songs_in_most_playlists'].to_pandas()
         
-        if not songs_data:
+        if len(top_songs) == 0:
             st.info("No songs found in multiple playlists")
             return
-            
-        # Sort by playlist count and get top 25
-        songs_df = pd.DataFrame(songs_data)
-        top_songs = songs_df.nlargest(25, 'playlistCount')
         
         # Create horizontal bar chart
         fig = px.bar(top_songs,
@@ -367,10 +322,24 @@ def create_enhanced_filter(filter_type, label, icon, options, selected_values, s
 UNLIMITED_MODE = True
 MAX_UI_FILTER_OPTIONS = 10000  # Increased to handle full datasets efficiently
 CACHE_DIR = 'cache'
+DATASETS_DIR = os.path.join(CACHE_DIR, 'datasets')  # One hive dataset per profile, apart from the shared stores below
+OBJECTS_DIR = os.path.join(CACHE_DIR, '_objects')  # Content-addressed fragments shared by all profiles
 SMART_CACHE_ENABLED = True
 SAMPLE_RATIO = 1.0  # USE ALL DATA: No sampling for complete functionality
-MIN_SAMPLE_SIZE = 1000  # Minimum sample size (not used when ratio = 1.0)
-MAX_JSON_RECORDS_PER_FILE = 100000  # Increased for better data coverage
+INGEST_BATCH_RECORDS = ingest.STREAM_BATCH_RECORDS  # Ingest memory budget: records held per worker at a time
+PARTITION_ROWS = ingest.DEFAULT_PARTITION_ROWS  # Max rows per parquet file inside a year partition
+PARQUET_WRITE_PROFILE = ingest.DEFAULT_WRITE_PROFILE  # Codec/level/row-group profile, see ingest.PARQUET_WRITE_PROFILES
+INGEST_MAX_WORKERS = ingest.DEFAULT_MAX_WORKERS  # Process pool size for StreamingHistory files (1 = sequential)
+INGEST_POLL_SECONDS = 0.5  # How often the right panel refreshes a running ingest job
+PANEL_CACHE_ENTRIES = 512  # Aggregated panel frames kept in memory (LRU)
+PANEL_CACHE_DIR = os.path.join(CACHE_DIR, '_panels')  # Arrow IPC tier on disk; None keeps the cache in memory only
+PANEL_CACHE_MAX_BYTES = 256 << 20  # Disk tier budget, least recently used entries go first
+SESSION_GAP_MINUTES = ingest.DEFAULT_SESSION_GAP_MINUTES  # Idle time that ends a listening session
+PANEL_CACHE_VERSION = 4  # Bump whenever a panel query in queries.py changes its output
+
+def to_pandas_display(df):
+    """Convert an aggregated frame for plotting, with categorical columns as plain strings"""
+    return df.with_columns(pl.col(pl.Categorical).cast(pl.Utf8)).to_pandas()
 
 # CLOUD-OPTIMIZED: Ensure directories exist with error handling
 try:
@@ -380,6 +349,8 @@ except Exception as e:
     st.error(f"Error creating cache directory: {e}")
 
 PROFILE_DIR = 'Profiles'
+UPLOAD_INDEX_NAME = '.content_hashes'  # Per-profile {file: [fingerprint, blake2b]} written during upload
+UPLOAD_CHUNK_BYTES = 1 << 20  # Uploads are copied to disk this many bytes at a time
 try:
     if not os.path.exists(PROFILE_DIR):
         os.makedirs(PROFILE_DIR, exist_ok=True)
@@ -389,7 +360,7 @@ except Exception as e:
 # CLOUD COMPATIBILITY: Add session cleanup for memory management
 if len(st.session_state) > 50:  # Prevent session bloat in cloud
     # Keep only essential keys
-    essential_keys = ['selected_profile', 'df', 'apply_filters', 'profile_ready', 'filters_ready']
+    essential_keys = ['selected_profile', 'lf', 'profile_records', 'apply_filters', 'profile_ready', 'filters_ready']
     keys_to_remove = [k for k in st.session_state.keys() if k not in essential_keys and not k.startswith('_filter')]
     for key in keys_to_remove[:10]:  # Remove max 10 at a time
         if key in st.session_state:
@@ -423,142 +394,340 @@ if not st.session_state.get('profile_ready', False):
     
     st.info("📋 **Ready?** Create a profile on the right and upload your Spotify data files to begin your musical journey!")
 
-# NEW: Cache management functions
-def get_cache_path(profile_name, cache_type='data'):
-    """Get the cache file path for a profile"""
-    return os.path.join(CACHE_DIR, f"{profile_name}_{cache_type}.pkl")
-
-def get_profile_hash(profile_name):
-    """Get a hash of all files in the profile for cache validation"""
+# NEW: Cache management functions - a versioned manifest per profile
+# Bump an artifact's version whenever the logic that derives it changes
+ARTIFACT_VERSIONS = {
+    'data': ingest.SCHEMA_VERSION,
+    'cube': 2,
+    'index': 2,  # Row ids point into the cube
+    'sessions': f"1-gap{SESSION_GAP_MINUTES}",  # The gap changes every session boundary
+    'account': 1,
+    'library': 1,
+    'searches': 1,
+    'wrapped': 1,
+    'playlists': 2,
+    'playlist_tracks': 1,
+    'additional': 1,
+}
+ARTIFACT_FILES = {
+    'cube': 'cube.parquet',
+    'index': 'index.parquet',
+    'sessions': 'sessions.parquet',
+    'account': 'account.json',
+    'library': 'library.json',
+    'searches': 'searches.parquet',
+    'wrapped': 'wrapped.json',
+    'playlists': 'playlists.parquet',
+    'playlist_tracks': 'playlist_tracks.parquet',
+    'additional': 'additional.json',
+}
+# Main-panel filter -> indexed column (see ingest.INDEX_COLUMNS)
+INDEX_FILTER_COLUMNS = {'artists': 'artistName', 'albums': 'albumName', 'tracks': 'trackName'}
+# Artifacts derived from another artifact's sources rather than their own
+DERIVED_ARTIFACTS = {'cube': 'data', 'index': 'cube', 'sessions': 'data', 'playlist_tracks': 'playlists'}
+# Derived artifacts written while parsing their source artifact's files, so both are rebuilt together
+SAME_PASS_ARTIFACTS = {'playlist_tracks': 'playlists'}
+ADDITIONAL_SOURCE_FILES = ['Follow.json', 'UserPrompts.json', 'PodcastInteractivityVotedPollOption.json',
+                           'UserAddress.json', 'Identifiers.json', 'Purchases.json', 'Payments.json']
+
+def get_manifest_path(profile_name):
+    """Get the cache manifest path for a profile"""
+    return os.path.join(CACHE_DIR, f"{profile_name}_manifest.json")
+
+def get_artifact_path(profile_name, artifact):
+    """Get the cache path an artifact is written to"""
+    if artifact == 'data':
+        return get_dataset_dir(profile_name)
+    return os.path.join(CACHE_DIR, f"{profile_name}_{ARTIFACT_FILES[artifact]}")
+
+def artifact_for_file(fname):
+    """Which cached artifact a profile source file (or zip member) feeds (None = not ingested)"""
+    fname = ingest.source_name(fname)
+    if ingest.is_streaming_history_file(fname):
+        return 'data'
+    if fname == 'Userdata.json':
+        return 'account'
+    if fname == 'YourLibrary.json':
+        return 'library'
+    if fname == 'SearchQueries.json':
+        return 'searches'
+    if 'Wrapped' in fname:
+        return 'wrapped'
+    if 'Playlist' in fname:
+        return 'playlists'
+    if fname in ADDITIONAL_SOURCE_FILES:
+        return 'additional'
+    return None
+
+def get_profile_sources(profile_name):
+    """Fingerprint of every JSON source in a profile: plain files and the JSON members of export zips"""
     profile_path = os.path.join(PROFILE_DIR, profile_name)
     if not os.path.exists(profile_path):
+        return {}
+    sources = {}
+    for fname in sorted(os.listdir(profile_path)):
+        if fname.endswith('.json'):
+            sources[fname] = ingest.file_fingerprint(os.path.join(profile_path, fname))
+        elif fname.endswith('.zip'):
+            try:
+                members = ingest.zip_json_members(os.path.join(profile_path, fname))
+            except Exception as e:
+                print(f"❌ Unreadable archive {fname}: {e}")
+                continue
+            for member in members:
+                source = f"{fname}{ingest.ZIP_MEMBER_SEPARATOR}{member}"
+                sources[source] = ingest.file_fingerprint(os.path.join(profile_path, source))
+    return sources
+
+def get_artifact_inputs(artifact, sources, artifacts):
+    """Source fingerprints an artifact is built from; derived artifacts also pin the build they were derived from"""
+    source_artifact = DERIVED_ARTIFACTS.get(artifact, artifact)
+    inputs = {fname: fp for fname, fp in sources.items() if artifact_for_file(fname) == source_artifact}
+    if artifact in DERIVED_ARTIFACTS:
+        # A rebuild of the source artifact (schema bump, damaged output) changes its checksum even with identical files
+        source_record = artifacts.get(source_artifact) or {}
+        inputs[f"@{source_artifact}"] = [source_record.get('version'), source_record.get('checksum')]
+    return inputs
+
+def get_stale_artifacts(profile_name, manifest, sources):
+    """Artifacts whose source fingerprints or version changed, or whose output is missing/damaged"""
+    stale = []
+    for artifact, version in ARTIFACT_VERSIONS.items():
+        inputs = get_artifact_inputs(artifact, sources, manifest['artifacts'])
+        record = manifest['artifacts'].get(artifact)
+        moved = record and record.get('path') not in (None, get_artifact_path(profile_name, artifact))  # Older cache layout
+        if DERIVED_ARTIFACTS.get(artifact) in stale or moved or not ingest.artifact_is_fresh(record, inputs, version):
+            stale.append(artifact)
+    for artifact, source_artifact in SAME_PASS_ARTIFACTS.items():
+        if (artifact in stale) != (source_artifact in stale):
+            stale.append(source_artifact if artifact in stale else artifact)
+    return stale
+
+def save_artifact(path, data):
+    """Write a json/parquet artifact atomically; empty data removes it. Returns the path or None"""
+    if data is None or len(data) == 0:
+        if os.path.exists(path):
+            os.remove(path)
         return None
-    
-    files = [f for f in os.listdir(profile_path) if f.endswith('.json')]
-    if not files:
-        return None
-    
-    # Create hash based on file modification times and sizes
-    hash_input = ""
-    for file in sorted(files):
-        file_path = os.path.join(profile_path, file)
-        stat = os.stat(file_path)
-        hash_input += f"{file}:{stat.st_mtime}:{stat.st_size}:"
-    
-    return hashlib.md5(hash_input.encode()).hexdigest()
-
-def save_cache(profile_name, data, cache_type='data'):
-    """Save processed data to cache"""
-    try:
-        cache_path = get_cache_path(profile_name, cache_type)
-        cache_data = {
-            'data': data,
-            'hash': get_profile_hash(profile_name),
-            'timestamp': time.time()
-        }
-        with open(cache_path, 'wb') as f:
-            pickle.dump(cache_data, f)
-        return True
-    except Exception:
-        return False  # Silent failure for speed
+    if path.endswith('.parquet'):
+        ingest.write_parquet(pl.DataFrame(data), path, PARQUET_WRITE_PROFILE)
+    else:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    return path
+
+# NEW: EXTREME PERFORMANCE - Year-partitioned parquet dataset
+def get_dataset_dir(profile_name):
+    """Get the year-partitioned (hive-style) parquet dataset directory for a profile"""
+    return os.path.join(DATASETS_DIR, profile_name)
+
+def scan_profile_data(profile_name):
+    """Lazy scan of the profile dataset; year filters prune whole partitions"""
+    return ingest.scan_partitioned_dataset(get_dataset_dir(profile_name))
+
+def scan_profile_cube(profile_name):
+    """Lazy scan of the profile's aggregate cube (None if it has not been built)"""
+    cube_path = get_artifact_path(profile_name, 'cube')
+    if profile_name and os.path.exists(cube_path):
+        try:
+            return pl.scan_parquet(cube_path)
+        except:
+            pass
+    return None
 
-def load_cache(profile_name, cache_type='data'):
-    """Load processed data from cache if valid"""
-    try:
-        cache_path = get_cache_path(profile_name, cache_type)
-        if not os.path.exists(cache_path):
-            return None
-        
-        with open(cache_path, 'rb') as f:
-            cache_data = pickle.load(f)
-        
-        # Validate cache
-        current_hash = get_profile_hash(profile_name)
-        if cache_data.get('hash') != current_hash:
-            return None  # Cache is stale
-        
-        return cache_data['data']
-    except Exception:
-        return None  # Silent failure for speed
+@st.cache_resource(max_entries=4)
+def load_profile_cube(profile_name, checksum):
+    """The profile's aggregate cube in memory, keyed by the build the row-id index points into"""
+    return pl.read_parquet(get_artifact_path(profile_name, 'cube'))
 
-# NEW: EXTREME PERFORMANCE - Parquet pre-processing
-def get_parquet_path(profile_name):
-    """Get the parquet file path for ultra-fast loading"""
-    return os.path.join(CACHE_DIR, f"{profile_name}_data.parquet")
+@st.cache_resource(max_entries=32)
+def _read_manifest(manifest_path, mtime_ns):
+    return ingest.load_manifest(manifest_path)
 
-# NEW: STREAMING JSON PROCESSOR with aggressive limits
-def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False):
-    """COMPREHENSIVE SPOTIFY DATA INGESTION: Process ALL data types"""
-    parquet_path = get_parquet_path(profile_name)
-    
-    # Quick existence check
-    if not force_rebuild and os.path.exists(parquet_path):
-        return True
-    
+def load_profile_manifest(profile_name):
+    """The profile's manifest as last saved, parsed once per write; read-only (a rebuild edits its own copy)"""
+    manifest_path = get_manifest_path(profile_name)
+    try:
+        return _read_manifest(manifest_path, os.stat(manifest_path).st_mtime_ns)
+    except OSError:
+        return ingest.load_manifest(manifest_path)
+
+def get_playlist_plays(profile_name, lf):
+    """Plays to join playlist items against: the aggregate cube when it has been built, else the play log"""
+    cube_lf = scan_profile_cube(profile_name)
+    return cube_lf if cube_lf is not None else lf
+
+def filter_cube_rows(profile_name, filters):
+    """Apply name filters through the row-id index as a take on the in-memory aggregate cube.
+
+    Returns None when the index cannot be used (no name filter, or no index
+    built over the current cube).
+    """
+    selections = {column: filters[key] for key, column in INDEX_FILTER_COLUMNS.items() if filters.get(key)}
+    if not selections or not profile_name:
+        return None
+    artifacts = load_profile_manifest(profile_name).get('artifacts', {})
+    cube, index = artifacts.get('cube') or {}, artifacts.get('index') or {}
+    if not cube.get('path') or not index.get('path') or \
+            index.get('inputs', {}).get('@cube') != [cube.get('version'), cube.get('checksum')]:
+        return None
+    try:
+        row_ids = ingest.lookup_row_ids(index['path'], selections)
+        cube_df = load_profile_cube(profile_name, cube['checksum'])
+    except:
+        return None
+    return queries.apply_filters(cube_df.gather(row_ids).lazy(), years=filters.get('years'))
+
+def get_profile_record_count(profile_name):
+    """Streaming records in the profile dataset as last built (0 if there is none)"""
+    manifest = load_profile_manifest(profile_name) if profile_name else {}
+    return manifest.get('artifacts', {}).get('data', {}).get('rows') or 0
+
+def get_profile_timestamps(profile_name):
+    """Timestamp metadata recorded when the profile dataset was built (None for older caches)"""
+    manifest = load_profile_manifest(profile_name) if profile_name else {}
+    return manifest.get('artifacts', {}).get('data', {}).get('timestamps')
+
+def get_profile_fingerprint(profile_name):
+    """Identity of the profile's dataset and the tables derived from it, as last built (None if there is no manifest)"""
+    manifest = load_profile_manifest(profile_name) if profile_name else {}
+    artifacts = manifest.get('artifacts', {})
+    if 'data' not in artifacts or not os.path.isdir(get_dataset_dir(profile_name)):
+        return None
+    parts = [PANEL_CACHE_VERSION] + [
+        [artifacts.get(name, {}).get(field) for field in ('version', 'bytes', 'checksum')]
+        for name in ('data', 'cube', 'sessions', 'playlist_tracks')
+    ]
+    return hashlib.blake2b(json.dumps(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+def get_legacy_fragments_dir(profile_name):
+    """Per-profile fragment directory used before fragments were shared across profiles"""
+    return os.path.join(CACHE_DIR, f"{profile_name}_fragments")
+
+def get_profile_content_hashes(profile_name, files, sources, manifest):
+    """blake2b of each of ``files``' bytes, reusing the manifest's value while the fingerprint is unchanged"""
+    profile_path = os.path.join(PROFILE_DIR, profile_name)
+    known = dict(load_upload_index(profile_name))  # Hashed while the upload was written
+    known.update(manifest.get('content_hashes', {}))
+    hashes = {}
+    for fname in files:
+        fingerprint = sources[fname]
+        cached = known.get(fname)
+        if cached and cached[0] == fingerprint:
+            hashes[fname] = cached[1]
+        else:
+            hashes[fname] = ingest.content_hash(os.path.join(profile_path, fname))
+    return hashes
+
+def delete_profile_cache(profile_name):
+    """Remove a profile's cached artifacts and reclaim fragments no other profile references"""
+    get_job_registry().cancel(profile_name)
+    shutil.rmtree(get_dataset_dir(profile_name), ignore_errors=True)
+    shutil.rmtree(get_legacy_fragments_dir(profile_name), ignore_errors=True)
+    paths = [get_artifact_path(profile_name, artifact) for artifact in ARTIFACT_FILES]
+    paths += [get_manifest_path(profile_name), os.path.join(CACHE_DIR, f"{profile_name}_ingest_report.json")]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    get_panel_cache().drop_profile(profile_name)
+    reclaimed = ingest.release_fragment_refs(OBJECTS_DIR, profile_name)
+    print(f"🧹 Removed cache for {profile_name}: {len(reclaimed)} unshared fragments reclaimed")
+
+# NEW: STREAMING JSON PROCESSOR with per-file incremental rebuilds
+def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False, job=None):
+    """COMPREHENSIVE SPOTIFY DATA INGESTION: Process ALL data types (job: optional jobs.IngestJob for progress/cancel)"""
+    dataset_dir = get_dataset_dir(profile_name)
+    manifest_path = get_manifest_path(profile_name)
     profile_path = os.path.join(PROFILE_DIR, profile_name)
-    files = [fname for fname in os.listdir(profile_path) if fname.endswith('.json')]
     
-    if not files:
+    # Validate against the manifest: only artifacts whose inputs or version changed are rebuilt
+    sources = get_profile_sources(profile_name)
+    if not sources:
         return False
+    manifest = ingest.load_manifest(manifest_path)
+    if force_rebuild:
+        manifest['artifacts'] = {}
+    stale = get_stale_artifacts(profile_name, manifest, sources)
+    if not stale:
+        return manifest['artifacts']['data']['path'] is not None
+    print(f"🔄 Rebuilding {', '.join(stale)} for {profile_name}")
+    
+    files = [fname for fname in sources if artifact_for_file(fname) in stale]
+    shutil.rmtree(get_legacy_fragments_dir(profile_name), ignore_errors=True)
     
     # COMPREHENSIVE DATA COLLECTION
-    streaming_data = []
     account_data = {}
     library_data = {}
     search_data = []
     wrapped_data = {}
     playlist_data = []
+    playlist_track_rows = []
+    ingest_report = []  # Rows read vs written per file
     
     print(f"🔍 Processing {len(files)} Spotify data files...")
     
-    for fname in files:
-        file_path = os.path.join(profile_path, fname)
+    # Every source is identified by content, so a zip member and its extracted copy are parsed once
+    content_hashes = get_profile_content_hashes(profile_name, files, sources, manifest)
+    manifest['content_hashes'] = {fname: entry for fname, entry in manifest.get('content_hashes', {}).items() if fname in sources}
+    manifest['content_hashes'].update({fname: [sources[fname], h] for fname, h in content_hashes.items()})
+    
+    # 1. STREAMING HISTORY DATA (One fragment per file content, shared by every profile holding it)
+    streaming_files = [fname for fname in files if artifact_for_file(fname) == 'data']
+    fragment_keys = {fname: ingest.fragment_key(content_hashes[fname]) for fname in streaming_files}
+    fragment_dirs = {fname: ingest.fragment_path(OBJECTS_DIR, key) for fname, key in fragment_keys.items()}
+    for key in set(fragment_keys.values()):
+        ingest.add_fragment_ref(OBJECTS_DIR, key, profile_name)
+    stale_files = []
+    for fname in streaming_files:
+        # Identical files (even within one profile) are ingested once
+        if (force_rebuild or not os.path.isdir(fragment_dirs[fname])) and fragment_dirs[fname] not in [fragment_dirs[f] for f in stale_files]:
+            stale_files.append(fname)
+    print(f"📊 Streaming files: {len(streaming_files) - len(stale_files)} cached, {len(stale_files)} to ingest")
+    ingest.build_fragments(
+        [os.path.join(profile_path, fname) for fname in stale_files],
+        [fragment_dirs[fname] for fname in stale_files],
+        max_workers=INGEST_MAX_WORKERS,
+        batch_size=INGEST_BATCH_RECORDS,
+        progress=job.file_progress if job else None
+    )
+    
+    part_paths = []
+    for fname in streaming_files:
+        report = ingest.load_fragment_report(fragment_dirs[fname])
+        if report is None:
+            continue  # Failed to ingest, already reported
+        report['file'] = fname  # The shared fragment may have been built from a copy with another name
+        print(f"📊 Streaming file: {report['file']} ({report['rows_read']:,} read, {report['rows_written']:,} written)")
+        ingest_report.append(report)
+        parts = ingest.fragment_parts(fragment_dirs[fname])
+        if parts and parts[0] in part_paths:
+            print(f"   ↪️ Same content as another file in this profile (e.g. a zip and its extracted copy), counted once")
+            continue
+        part_paths.extend(parts)
+    
+    # Release fragments of files that are no longer part of the profile
+    if 'data' in stale:
+        ingest.release_fragment_refs(OBJECTS_DIR, profile_name, keep=fragment_keys.values())
+    files = [fname for fname in files if fname not in streaming_files]
+    
+    parsed_contents = set()
+    for source in files:
+        if job:
+            job.raise_if_cancelled()
+        fname = ingest.source_name(source)  # Zip members route by their own file name
+        content_key = (artifact_for_file(source), content_hashes[source])  # e.g. two empty lists of different kinds are not copies
+        if content_key in parsed_contents:
+            print(f"   ↪️ {source}: same content as another file in this profile, parsed once")
+            continue
+        parsed_contents.add(content_key)
+        file_path = os.path.join(profile_path, source)
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                data = json.load(f)
-            
-            # 1. STREAMING HISTORY DATA (Enhanced Processing)
-            if 'Streaming_History' in fname or 'StreamingHistory' in fname:
-                if isinstance(data, list):
-                    print(f"📊 Processing streaming file: {fname} ({len(data)} records)")
-                    # Process with improved sampling for large files
-                    sample_size = min(len(data), 100000)  # Increased limit
-                    sampled_data = data[::max(1, len(data)//sample_size)]  # Smart sampling
-                    
-                    for record in sampled_data:
-                        try:
-                            ts_value = record.get('ts') or record.get('endTime', '')
-                            if isinstance(ts_value, dict):
-                                ts_value = ts_value.get('$date', str(ts_value))
-                            
-                            # Extract year and additional metadata
-                            year = 2023
-                            if ts_value and len(str(ts_value)) >= 4:
-                                try:
-                                    year = int(str(ts_value)[:4])
-                                except:
-                                    year = 2023
-                            
-                            streaming_data.append({
-                                'trackName': str(record.get('master_metadata_track_name') or record.get('trackName') or 'Unknown')[:100],
-                                'artistName': str(record.get('master_metadata_album_artist_name') or record.get('artistName') or 'Unknown')[:100],
-                                'albumName': str(record.get('master_metadata_album_album_name') or record.get('albumName') or 'Unknown')[:100],
-                                'year': year,
-                                'msPlayed': float(record.get('ms_played') or record.get('msPlayed', 0)),
-                                'ts': ts_value,
-                                'platform': str(record.get('platform', 'Unknown'))[:50],
-                                'skipped': record.get('skipped', False),
-                                'shuffle': record.get('shuffle', False),
-                                'offline': record.get('offline', False),
-                                'reason_start': str(record.get('reason_start', 'Unknown'))[:30],
-                                'reason_end': str(record.get('reason_end', 'Unknown'))[:30],
-                                'conn_country': str(record.get('conn_country', 'Unknown'))[:10]
-                            })
-                        except:
-                            continue
+            data = ingest.load_json_source(file_path)
             
             # 2. USER ACCOUNT DATA
-            elif fname == 'Userdata.json':
+            if fname == 'Userdata.json':
                 print(f"👤 Processing account data: {fname}")
                 account_data = {
                     'username': data.get('username', ''),
@@ -597,25 +766,30 @@ def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False):
                             'album': track.get('album', 'Unknown')[:100],
                             'track': track.get('track', 'Unknown')[:100],
                             'uri': track.get('uri', '')
-                        } for track in data.get('tracks', [])[:500]  # Limit for performance
+                        } for track in data.get('tracks', [])
                     ],
                     'saved_albums': [
                         {
                             'artist': album.get('artist', 'Unknown')[:100],
                             'album': album.get('album', 'Unknown')[:100],
                             'uri': album.get('uri', '')
-                        } for album in data.get('albums', [])[:500]
+                        } for album in data.get('albums', [])
                     ]
                 }
+                ingest_report.append({
+                    'file': fname,
+                    'rows_read': len(data.get('tracks', [])) + len(data.get('albums', [])),
+                    'rows_written': len(library_data['saved_tracks']) + len(library_data['saved_albums'])
+                })
             
             # 4. SEARCH HISTORY
             elif fname == 'SearchQueries.json':
                 print(f"🔍 Processing search data: {fname} ({len(data)} searches)")
-                search_sample = data[::max(1, len(data)//5000)]  # Sample for performance
-                for search in search_sample:
+                searches_before = len(search_data)
+                for search in data:
                     try:
                         search_time = search.get('searchTime', '')
-                        search_year = 2023
+                        search_year = None  # Unparseable timestamps stay null
                         if search_time and len(search_time) >= 4:
                             try:
                                 search_year = int(search_time[:4])
@@ -631,6 +805,7 @@ def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False):
                         })
                     except:
                         continue
+                ingest_report.append({'file': fname, 'rows_read': len(data), 'rows_written': len(search_data) - searches_before})
             
             # 5. SPOTIFY WRAPPED DATA
             elif 'Wrapped' in fname:
@@ -652,35 +827,30 @@ def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False):
             elif 'Playlist' in fname:
                 print(f"🎵 Processing playlist data: {fname}")
                 if isinstance(data, dict) and 'playlists' in data:
+                    playlists_before = len(playlist_data)
                     for playlist in data['playlists']:
                         try:
+                            playlist_track_rows.extend(ingest.playlist_track_rows(playlist))
                             playlist_name = playlist.get('name', 'Unknown Playlist')
                             items = playlist.get('items', [])
                             
-                            # Calculate total minutes for this playlist based on actual streaming data
-                            # We'll use the track count and estimate minutes based on average listening patterns
-                            total_minutes = 0
+                            # Minutes played are joined from the play log at render time (queries.playlist_minutes_plan)
                             track_count = len(items)
                             
-                            # Better estimation: assume average 3.5 minutes per track
-                            # This is more realistic than trying to parse track durations that may not be available
-                            if track_count > 0:
-                                total_minutes = track_count * 3.5  # Average song length
-                            
                             # Only add playlists with actual tracks
                             if track_count > 0 and playlist_name != 'Unknown Playlist':
                                 playlist_data.append({
                                     'playlistName': str(playlist_name)[:100],
-                                    'totalMinutes': total_minutes,
                                     'trackCount': track_count,
                                     'collaborative': playlist.get('collaborative', False),
                                     'lastModified': playlist.get('lastModifiedDate', ''),
                                     'description': str(playlist.get('description', ''))[:200]
                                 })
-                                print(f"   ✅ Added playlist: {playlist_name} ({track_count} tracks, ~{total_minutes:.1f} minutes)")
+                                print(f"   ✅ Added playlist: {playlist_name} ({track_count} tracks)")
                         except Exception as e:
                             print(f"   ⚠️ Error processing playlist in {fname}: {e}")
                             continue
+                    ingest_report.append({'file': fname, 'rows_read': len(data['playlists']), 'rows_written': len(playlist_data) - playlists_before})
                 else:
                     print(f"   ⚠️ Unexpected playlist format in {fname}")
                 print(f"   📊 Total playlists processed from {fname}: {len([p for p in playlist_data if p['playlistName']])}")
@@ -763,63 +933,85 @@ def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False):
             print(f"❌ Error processing {fname}: {e}")
             continue
     
-    # CREATE MAIN DATAFRAME with enhanced data
-    if not streaming_data:
-        return False
+    # CREATE MAIN DATASET from the parquet parts (streamed, never fully in memory)
+    if job:
+        job.raise_if_cancelled()  # Last point to stop before any artifact is swapped in
     
     try:
-        # Create main streaming DataFrame
-        df = pl.DataFrame(streaming_data)
-        df = df.filter(pl.col('trackName').str.len_chars() > 0)
-        
-        # Add derived columns for richer analysis
-        df = df.with_columns([
-            (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed'),
-            (pl.col('msPlayed') / (1000 * 60 * 60)).alias('hoursPlayed'),
-            pl.when(pl.col('msPlayed') > 30000).then(pl.lit('Complete')).otherwise(pl.lit('Partial')).alias('playType'),
-            pl.when(pl.col('skipped')).then(pl.lit('Skipped')).otherwise(pl.lit('Completed')).alias('completion'),
-            # Extract month for improved temporal analysis
-            pl.col('ts').cast(pl.Utf8).str.slice(0, 7).alias('year_month'),
-            pl.col('ts').cast(pl.Utf8).str.slice(0, 10).alias('date')
-        ])
-        
-        # Save main streaming data
-        df.write_parquet(parquet_path)
+        artifacts = manifest['artifacts']
+        reports = {artifact: [] for artifact in stale}
+        for entry in ingest_report:
+            reports[artifact_for_file(entry['file'])].append(entry)
         
-        # Save additional datasets for future use
-        cache_dir = os.path.dirname(parquet_path)
-        
-        # Save account data
-        if account_data:
-            account_path = os.path.join(cache_dir, f"{profile_name}_account.json")
-            with open(account_path, 'w') as f:
-                json.dump(account_data, f, indent=2)
+        def record(artifact, path, **extra):
+            inputs = get_artifact_inputs(artifact, sources, artifacts)
+            artifacts[artifact] = ingest.artifact_record(path, inputs, ARTIFACT_VERSIONS[artifact],
+                                                         report=reports[artifact], **extra)
         
-        # Save library data
-        if library_data:
-            library_path = os.path.join(cache_dir, f"{profile_name}_library.json")
-            with open(library_path, 'w') as f:
-                json.dump(library_data, f, indent=2)
+        if 'data' in stale:
+            if part_paths:
+                streaming_records = ingest.assemble_partitioned_dataset(
+                    part_paths, dataset_dir,
+                    categorical_columns=ingest.CATEGORICAL_COLUMNS,
+                    partition_rows=PARTITION_ROWS,
+                    write_profile=PARQUET_WRITE_PROFILE
+                )
+                # Timestamp column/format/timezone detected once here, read directly by the trend charts
+                timestamps = ingest.timestamp_metadata(scan_profile_data(profile_name))
+                record('data', dataset_dir, rows=streaming_records, timestamps=timestamps)
+                print(f"🕒 Timestamps: {timestamps['parsed_rows']:,} parsed ({timestamps['timezone']}, {timestamps['format']}), {timestamps['months']} months")
+            else:
+                shutil.rmtree(dataset_dir, ignore_errors=True)
+                record('data', None, rows=0)
+            
+            # Pre-partitioning caches kept the whole profile in one file
+            legacy_parquet = os.path.join(CACHE_DIR, f"{profile_name}_data.parquet")
+            if os.path.exists(legacy_parquet):
+                os.remove(legacy_parquet)
+            # Datasets used to sit directly in CACHE_DIR; only a directory of year partitions is one of those
+            legacy_dataset = os.path.join(CACHE_DIR, profile_name)
+            if os.path.isdir(legacy_dataset) and os.listdir(legacy_dataset) and \
+                    all(name.startswith('year=') for name in os.listdir(legacy_dataset)):
+                shutil.rmtree(legacy_dataset)
         
-        # Save search data
-        if search_data:
-            search_df = pl.DataFrame(search_data)
-            search_path = os.path.join(cache_dir, f"{profile_name}_searches.parquet")
-            search_df.write_parquet(search_path)
+        # Pre-aggregated cube the dashboard panels read instead of the raw play log
+        if 'cube' in stale:
+            cube_path = get_artifact_path(profile_name, 'cube')
+            if artifacts['data']['path']:
+                cube_rows = ingest.build_cube(scan_profile_data(profile_name), cube_path, PARQUET_WRITE_PROFILE)
+                record('cube', cube_path, rows=cube_rows)
+                print(f"🧊 Aggregate cube: {cube_rows:,} rows ({artifacts['data'].get('rows', 0) / max(cube_rows, 1):.1f}x smaller)")
+            else:
+                if os.path.exists(cube_path):
+                    os.remove(cube_path)
+                record('cube', None, rows=0)
         
-        # Save wrapped data
-        if wrapped_data:
-            wrapped_path = os.path.join(cache_dir, f"{profile_name}_wrapped.json")
-            with open(wrapped_path, 'w') as f:
-                json.dump(wrapped_data, f, indent=2)
+        # Inverted name -> cube row-id index so artist/album/track filters become a take on the cube
+        if 'index' in stale:
+            index_path = get_artifact_path(profile_name, 'index')
+            if artifacts['cube']['path']:
+                index_keys = ingest.build_row_index(pl.scan_parquet(artifacts['cube']['path']), index_path, PARQUET_WRITE_PROFILE)
+                record('index', index_path, keys=index_keys)
+                print(f"🗂️ Row-id index: {index_keys:,} names")
+            else:
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+                record('index', None, keys=0)
         
-        # Save playlist data
-        if playlist_data:
-            playlist_df = pl.DataFrame(playlist_data)
-            playlist_path = os.path.join(cache_dir, f"{profile_name}_playlists.parquet")
-            playlist_df.write_parquet(playlist_path)
+        # Listening sessions: one sort of the play log, split wherever the idle gap exceeds SESSION_GAP_MINUTES
+        if 'sessions' in stale:
+            sessions_path = get_artifact_path(profile_name, 'sessions')
+            if artifacts['data']['path']:
+                session_rows = ingest.build_sessions(scan_profile_data(profile_name), sessions_path,
+                                                     SESSION_GAP_MINUTES, PARQUET_WRITE_PROFILE)
+                record('sessions', sessions_path, rows=session_rows, gap_minutes=SESSION_GAP_MINUTES)
+                print(f"🎧 Listening sessions: {session_rows:,} ({SESSION_GAP_MINUTES} min gap)")
+            else:
+                if os.path.exists(sessions_path):
+                    os.remove(sessions_path)
+                record('sessions', None, rows=0)
         
-        # Save additional comprehensive data
+        # Save additional datasets for future use
         additional_data = {}
         if 'follow_data' in locals():
             additional_data['follow'] = follow_data
@@ -836,62 +1028,147 @@ def convert_profile_to_comprehensive_data(profile_name, force_rebuild=False):
         if 'payments_data' in locals():
             additional_data['payments'] = payments_data
         
-        if additional_data:
-            additional_path = os.path.join(cache_dir, f"{profile_name}_additional.json")
-            with open(additional_path, 'w') as f:
-                json.dump(additional_data, f, indent=2)
+        derived = {
+            'account': account_data,
+            'library': library_data,
+            'searches': search_data,
+            'wrapped': wrapped_data,
+            'playlists': playlist_data,
+            'playlist_tracks': ingest.playlist_tracks_frame(playlist_track_rows),
+            'additional': additional_data,
+        }
+        for artifact, data in derived.items():
+            if artifact in stale:
+                record(artifact, save_artifact(get_artifact_path(profile_name, artifact), data))
+        
+        # Save the per-file ingest report (rows read vs written), merged across artifacts
+        report_path = os.path.join(CACHE_DIR, f"{profile_name}_ingest_report.json")
+        with open(report_path, 'w') as f:
+            json.dump([entry for artifact in ARTIFACT_VERSIONS for entry in artifacts.get(artifact, {}).get('report', [])], f, indent=2)
+        
+        # The manifest is written last: an interrupted rebuild is simply redone
+        manifest['schema_version'] = ingest.SCHEMA_VERSION
+        manifest['sources'] = sources
+        ingest.save_manifest(manifest_path, manifest)
         
-        print(f"✅ Successfully processed all Spotify data for {profile_name}")
-        print(f"   📊 Streaming records: {len(df):,}")
-        print(f"   👤 Account data: {'✓' if account_data else '✗'}")
-        print(f"   📚 Library data: {'✓' if library_data else '✗'}")
-        print(f"   🔍 Search records: {len(search_data):,}")
-        print(f"   🎁 Wrapped data: {'✓' if wrapped_data else '✗'}")
-        print(f"   🎵 Playlist data: {'✓' if playlist_data else '✗'}")
-        print(f"   👥 Follow data: {'✓' if 'follow_data' in locals() else '✗'}")
-        print(f"   💬 Prompts data: {'✓' if 'prompts_data' in locals() else '✗'}")
-        print(f"   🎙️ Podcast interactions: {'✓' if 'podcast_interactions' in locals() else '✗'}")
-        print(f"   📍 Address data: {'✓' if 'address_data' in locals() else '✗'}")
-        print(f"   🆔 Identifiers: {'✓' if 'identifiers_data' in locals() else '✗'}")
-        print(f"   💳 Purchase data: {'✓' if 'purchases_data' in locals() else '✗'}")
-        print(f"   💰 Payment data: {'✓' if 'payments_data' in locals() else '✗'}")
+        print(f"✅ Successfully processed Spotify data for {profile_name} (rebuilt: {', '.join(stale)})")
+        print(f"   📊 Streaming records: {artifacts['data'].get('rows', 0):,}")
+        for artifact in ARTIFACT_FILES:
+            if artifact in DERIVED_ARTIFACTS:
+                continue
+            print(f"   {'✓' if artifacts[artifact]['path'] else '✗'} {artifact}{' (rebuilt)' if artifact in stale else ''}")
         
-        return True
+        return artifacts['data']['path'] is not None
         
     except Exception as e:
         print(f"❌ Error creating final datasets: {e}")
+        if job:
+            raise  # The job records it as FAILED; False would read as a profile without streaming data
         return False
 
 # Update the existing function to use the new comprehensive system
-def convert_profile_to_parquet_streaming(profile_name, force_rebuild=False):
+def convert_profile_to_parquet_streaming(profile_name, force_rebuild=False, job=None):
     """Updated to use comprehensive data processing"""
-    return convert_profile_to_comprehensive_data(profile_name, force_rebuild)
+    return convert_profile_to_comprehensive_data(profile_name, force_rebuild, job)
+
+# NEW: BACKGROUND INGESTION - conversion runs off the script thread and survives reruns/refreshes
+@st.cache_resource
+def get_job_registry():
+    """Process-wide registry of ingest jobs, shared by every browser session"""
+    return jobs.JobRegistry()
+
+# NEW: PANEL RESULT CACHE - aggregated panels keyed by (profile fingerprint, filters, panel id)
+@st.cache_resource
+def get_panel_cache():
+    """Process-wide panel result cache, shared by every browser session"""
+    return PanelCache(max_entries=PANEL_CACHE_ENTRIES, disk_dir=PANEL_CACHE_DIR, max_disk_bytes=PANEL_CACHE_MAX_BYTES)
+
+def collect_dashboard_panels(profile_name, base_lf, filters):
+    """Every dashboard panel for ``filters``, from the result cache when this combination was seen before.
+
+    A full hit does no Polars work: the cube is only scanned, and the schema
+    only resolved (the ``schema`` panel), when a panel has to be collected.
+    """
+    viz_lf = queries.apply_filters(base_lf, **filters)
+    
+    def build_plans():
+        # Only on a cache miss: the pre-aggregated cube whenever the filters are cube dimensions,
+        # with name filters going through its row-id index
+        cube_lf = scan_profile_cube(profile_name) if queries.can_use_cube(filters) else None
+        if cube_lf is None:
+            return queries.dashboard_plans(viz_lf)
+        plan_lf = filter_cube_rows(profile_name, filters)
+        return queries.dashboard_plans(plan_lf if plan_lf is not None else queries.apply_filters(cube_lf, **filters))
+    
+    panels = get_panel_cache().collect(
+        profile_name,
+        get_profile_fingerprint(profile_name) if base_lf is not None else None,
+        filters,
+        queries.DASHBOARD_PANELS,
+        build_plans,
+        queries.collect_plans,
+    )
+    return viz_lf, panels
+
+def get_top_by_year(panels, panel_id):
+    """``{year: top-N rows}`` of a by-year panel; split once per panel frame, so the year selector is a lookup"""
+    splits = st.session_state.setdefault('_top_by_year', {})
+    df = panels[panel_id]
+    cached = splits.get(panel_id)
+    if cached is None or cached[0] is not df:
+        cached = (df, queries.split_by_year(df))
+        splits[panel_id] = cached
+    return cached[1]
+
+def start_ingest_job(profile_name, force_rebuild=False):
+    """Start (or attach to) the background ingest job for a profile"""
+    return get_job_registry().submit(
+        profile_name,
+        lambda job: convert_profile_to_parquet_streaming(profile_name, force_rebuild, job)
+    )
+
+def show_ingest_job_progress(job):
+    """Right panel: per-file progress of a running ingest job with a cancel button"""
+    status = job.status()
+    st.info(f"⏳ Ingesting '{status['profile']}'... {status['elapsed']:.0f}s")
+    if status['bytes_total']:
+        st.progress(min(status['bytes_read'] / status['bytes_total'], 1.0),
+                    text=f"{status['bytes_read'] / (1 << 20):,.1f} / {status['bytes_total'] / (1 << 20):,.1f} MB read")
+    if status['files']:
+        progress_df = pd.DataFrame([{
+            'File': f['file'],
+            'MB Read': round(f['bytes_read'] / (1 << 20), 1),
+            'Records': f['records'],
+            'Records/sec': int(f['records_per_sec']),
+            'Done': '✅' if f['done'] else ('⏳' if f['started_at'] else '🕒'),
+        } for f in status['files']])
+        st.dataframe(progress_df, use_container_width=True, hide_index=True)
+    if job.is_cancelled():
+        st.caption("Cancelling after the current batch...")
+    elif st.button("Cancel Ingest", key=f"cancel_ingest_{job.id}"):
+        job.cancel()
 
 # NEW: ULTRA-FAST SAMPLED FILTER COMPUTATION
-def prepare_filters_sampled_turbo(df_data, profile_name):
-    """COMPLETE DATA: Use full dataset for comprehensive filtering with maximum speed optimizations"""
+def prepare_filters_sampled_turbo(lf, profile_name):
+    """Distinct values of the filter columns, from projected scans that read only those columns"""
     
-    if df_data is None or df_data.is_empty():
+    if lf is None:
         return {'years': [], 'artists': [], 'albums': [], 'songs': [], 'all_songs': []}
     
-    # NO SAMPLING: Use complete dataset for full functionality
-    # Apply ultra-fast Polars operations for maximum performance
-    
     try:
-        # LIGHTNING-FAST unique extraction using Polars lazy evaluation
-        # Process all columns in parallel for maximum speed
-        
-        # Years - small dataset, can afford sorting
-        years = sorted(df_data.select('year').drop_nulls().unique().to_series().to_list())
-        
-        # NO LIMITS: Get ALL unique values for complete functionality
-        # Using Polars' optimized unique() operation which is extremely fast
-        artists_raw = df_data.select('artistName').drop_nulls().unique().to_series().to_list()
-        albums_raw = df_data.select('albumName').drop_nulls().unique().to_series().to_list()
-        songs_raw = df_data.select('trackName').drop_nulls().unique().to_series().to_list()
+        # One projected unique() per column, collected together; year is the partition
+        # column, so its values come from the directory names alone
+        years, artists, albums, songs = pl.collect_all([
+            lf.select(pl.col(column).drop_nulls().unique())
+            for column in ['year', 'artistName', 'albumName', 'trackName']
+        ])
+        years = sorted(years.to_series().to_list())
         
         # Keep original unsorted for maximum speed in UI
         # The search interface handles large unsorted lists efficiently
+        artists_raw = artists.to_series().cast(pl.Utf8).to_list()
+        albums_raw = albums.to_series().cast(pl.Utf8).to_list()
+        songs_raw = songs.to_series().cast(pl.Utf8).to_list()
         
         return {
             'years': years,          # Sorted for better UX
@@ -908,38 +1185,29 @@ def prepare_filters_sampled_turbo(df_data, profile_name):
 
 # MODIFIED: Silent data loading with streaming
 def load_profile_data_silent_turbo(profile_name):
-    """EXTREME PERFORMANCE: Silent loading with streaming optimization"""
-    
-    # Try Parquet first
-    parquet_path = get_parquet_path(profile_name)
-    if os.path.exists(parquet_path):
-        try:
-            return pl.read_parquet(parquet_path)
-        except:
-            pass
-    
-    # Use streaming conversion
-    if convert_profile_to_parquet_streaming(profile_name):
+    """Lazy scan of the profile dataset (None if it is missing or empty); queries read only what they select.
+
+    Only reads the cache: building it is the background ingest job's work (see start_ingest_job).
+    """
+    if os.path.isdir(get_dataset_dir(profile_name)) and get_profile_record_count(profile_name) > 0:
         try:
-            return pl.read_parquet(parquet_path)
+            return scan_profile_data(profile_name)
         except:
             pass
-    
-    # Fallback: return empty DataFrame
-    return pl.DataFrame()
+    return None
 
 # ULTRA-OPTIMIZED: Remove all caching overhead for critical path
 def load_profile_data_turbo(profile_name):
     """Ultra-fast profile data loading without caching overhead"""
     return load_profile_data_silent_turbo(profile_name)
 
-def prepare_filters_turbo(df_data, profile_name):
-    """Ultra-fast filter preparation with sampling"""
-    return prepare_filters_sampled_turbo(df_data, profile_name)
+def prepare_filters_turbo(lf, profile_name):
+    """Ultra-fast filter preparation"""
+    return prepare_filters_sampled_turbo(lf, profile_name)
 
 def load_additional_spotify_data(profile_name):
     """Load all additional Spotify data (account, library, search, wrapped)"""
-    cache_dir = os.path.dirname(get_parquet_path(profile_name))
+    cache_dir = CACHE_DIR
     additional_data = {}
     
     # Load account data
@@ -985,15 +1253,26 @@ def load_additional_spotify_data(profile_name):
     else:
         additional_data['wrapped'] = {}
     
+    # Load ingest report (rows read vs written per file)
+    report_path = os.path.join(cache_dir, f"{profile_name}_ingest_report.json")
+    if os.path.exists(report_path):
+        try:
+            with open(report_path, 'r') as f:
+                additional_data['ingest_report'] = json.load(f)
+        except:
+            additional_data['ingest_report'] = []
+    else:
+        additional_data['ingest_report'] = []
+    
     return additional_data
 
 def get_spotify_insights_summary(profile_name):
     """Get a summary of all available Spotify data for the profile"""
     # Load main streaming data
     try:
-        df = load_profile_data_turbo(profile_name)
-        streaming_available = not df.is_empty()
-        streaming_records = len(df) if streaming_available else 0
+        lf = load_profile_data_turbo(profile_name)
+        streaming_available = lf is not None
+        streaming_records = get_profile_record_count(profile_name) if streaming_available else 0
     except:
         streaming_available = False
         streaming_records = 0
@@ -1035,13 +1314,13 @@ def get_spotify_insights_summary(profile_name):
     
     # Calculate enhanced columns available in streaming data
     if streaming_available:
-        available_columns = df.columns
+        available_columns = lf.collect_schema().names()
         enhanced_columns = [col for col in ['platform', 'skipped', 'shuffle', 'offline', 'reason_start', 'reason_end', 'conn_country', 'minutesPlayed', 'playType', 'completion'] if col in available_columns]
         summary['streaming']['enhanced_columns'] = enhanced_columns
         
         # Calculate year span
         try:
-            years = df.select('year').drop_nulls().unique().to_series().to_list()
+            years = lf.select(pl.col('year').drop_nulls().unique()).collect().to_series().to_list()
             if years:
                 summary['streaming']['years_span'] = max(years) - min(years) + 1
         except:
@@ -1052,10 +1331,10 @@ def get_spotify_insights_summary(profile_name):
 def load_profile_data_turbo_enhanced(profile_name):
     """Enhanced version that loads streaming data and additional datasets"""
     # Load main streaming data
-    df = load_profile_data_turbo(profile_name)
+    lf = load_profile_data_turbo(profile_name)
     
     # Load and store additional data in session state for easy access
-    if not df.is_empty():
+    if lf is not None:
         additional_data = load_additional_spotify_data(profile_name)
         st.session_state[f'{profile_name}_additional_data'] = additional_data
         
@@ -1063,7 +1342,7 @@ def load_profile_data_turbo_enhanced(profile_name):
         summary = get_spotify_insights_summary(profile_name)
         st.session_state[f'{profile_name}_data_summary'] = summary
     
-    return df
+    return lf
 
 # ORIGINAL FUNCTION: Keep for compatibility but mark as legacy
 @st.cache_data(show_spinner="Loading profile data...")
@@ -1075,13 +1354,45 @@ def load_profile_data_polars(profile_name):
 def list_profiles():
     return [d for d in os.listdir(PROFILE_DIR) if os.path.isdir(os.path.join(PROFILE_DIR, d))]
 
+def load_upload_index(profile_name):
+    """Content hash of each file in a profile, keyed by name; entries whose file changed are dropped"""
+    profile_path = os.path.join(PROFILE_DIR, profile_name)
+    try:
+        with open(os.path.join(profile_path, UPLOAD_INDEX_NAME), 'r') as f:
+            index = json.load(f)
+    except:
+        return {}
+    return {
+        fname: entry for fname, entry in index.items()
+        if os.path.exists(os.path.join(profile_path, fname))
+        and ingest.file_fingerprint(os.path.join(profile_path, fname)) == entry[0]
+    }
+
 def save_uploaded_files(profile_name, files):
+    """Stream uploads to disk in chunks, hashing while writing; content the profile already has is skipped"""
     profile_path = os.path.join(PROFILE_DIR, profile_name)
     os.makedirs(profile_path, exist_ok=True)
+    index = load_upload_index(profile_name)
+    known_hashes = {entry[1] for entry in index.values()}
+    saved, skipped = 0, 0
     for file in files:
         file.seek(0)
-        with open(os.path.join(profile_path, file.name), 'wb') as out:
-            out.write(file.read())
+        dest_path = os.path.join(profile_path, file.name)
+        tmp_path, content_hash, _ = ingest.stream_to_temp(file, dest_path, UPLOAD_CHUNK_BYTES)
+        if content_hash in known_hashes:
+            os.remove(tmp_path)  # Unchanged: keep the existing file (and its mtime) so nothing is re-ingested
+            skipped += 1
+            continue
+        os.replace(tmp_path, dest_path)
+        index[file.name] = [ingest.file_fingerprint(dest_path), content_hash]
+        known_hashes.add(content_hash)
+        saved += 1
+    
+    tmp_index = os.path.join(profile_path, UPLOAD_INDEX_NAME + '.tmp')
+    with open(tmp_index, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_index, os.path.join(profile_path, UPLOAD_INDEX_NAME))
+    return saved, skipped
 
 def _safe_numeric_convert(value):
     """Safely convert any value to float, handling various edge cases"""
@@ -1281,10 +1592,10 @@ with center:
     st.write(filter_message)
     
     # Get data and filter state
-    df = st.session_state.get('df', pl.DataFrame())
+    lf = st.session_state.get('lf')
     apply_filters = st.session_state.get('apply_filters', False)
     
-    if not df.is_empty():
+    if lf is not None:
         # Get filter values
         year_filter = st.session_state.get('year_filter', [])
         artist_filter = st.session_state.get('artist_filter', [])
@@ -1300,8 +1611,9 @@ with center:
         if apply_filters:
             # TURBO-OPTIMIZED PROCESSING: Maximum speed with smart filtering
             try:
-                # STEP 1: Lightning-fast filtering with intelligent detection
-                filtered_df = df
+                # STEP 1: Compose filters as lazy predicates over the parquet dataset
+                base_lf = lf
+                active_filters = {}
                 
                 # Use already computed filters for smart comparison
                 all_years = st.session_state.get('_filter_years', [])
@@ -1314,49 +1626,52 @@ with center:
                 
                 # Ultra-fast filtering - only apply if not selecting all options
                 if year_filter and len(year_filter) < len(all_years):
-                    filtered_df = filtered_df.filter(pl.col('year').is_in(year_filter))
+                    # Year predicate prunes whole hive partitions at scan time
+                    active_filters['years'] = year_filter
                     filters_applied = True
                 
-                if artist_filter and len(artist_filter) < len(all_artists) and len(filtered_df) > 0:
-                    filtered_df = filtered_df.filter(pl.col('artistName').is_in(artist_filter))
+                if artist_filter and len(artist_filter) < len(all_artists):
+                    active_filters['artists'] = artist_filter
                     filters_applied = True
                 
-                if album_filter and len(album_filter) < len(all_albums) and len(filtered_df) > 0:
-                    filtered_df = filtered_df.filter(pl.col('albumName').is_in(album_filter))
+                if album_filter and len(album_filter) < len(all_albums):
+                    active_filters['albums'] = album_filter
                     filters_applied = True
                 
                 # Smart song filtering with UI/backend awareness
-                if song_filter and len(filtered_df) > 0:
+                if song_filter:
                     # Check if we're filtering meaningfully
                     if len(ui_songs) < len(backend_all_songs) and len(song_filter) < len(ui_songs):
                         # Selective filtering on UI subset
-                        filtered_df = filtered_df.filter(pl.col('trackName').is_in(song_filter))
+                        active_filters['tracks'] = song_filter
                         filters_applied = True
                     elif len(ui_songs) == len(backend_all_songs) and len(song_filter) < len(backend_all_songs):
                         # Selective filtering on full set
-                        filtered_df = filtered_df.filter(pl.col('trackName').is_in(song_filter))
+                        active_filters['tracks'] = song_filter
                         filters_applied = True
                 
+                # STEP 2: Every panel's aggregation is planned lazily and collected in one pass,
+                # from the pre-aggregated cube whenever the active filters are cube dimensions
+                # and from the panel result cache for filter combinations seen before
+                viz_lf, panels = collect_dashboard_panels(st.session_state.get('selected_profile'), base_lf, active_filters)
+                
                 # Fallback protection
-                if len(filtered_df) == 0:
+                if panels['summary']['records'][0] == 0:
                     st.warning("⚠️ All data filtered out! Using full dataset.")
-                    filtered_df = df
-                
-                total_records = len(filtered_df)
-                viz_df = filtered_df
+                    viz_lf, panels = collect_dashboard_panels(st.session_state.get('selected_profile'), base_lf, {})
                 
-                # st.write(f"📈 Visualization data: {len(viz_df)} records")  # Removed for speed
+                summary = panels['summary'].row(0, named=True)
+                viz_columns = panels['schema'].columns
+                total_records = summary['records']
                 
-                # STEP 3: Ultra-fast metrics using Polars lazy evaluation
+                # STEP 3: Metrics straight from the collected summary
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("📊 Total Records", f"{total_records:,}")
                 with col2:
-                    st.metric("🎤 Filtered Records", f"{len(viz_df):,}")
+                    st.metric("🎤 Filtered Records", f"{total_records:,}")
                 with col3:
-                    # Use lazy evaluation for fast unique counting
-                    years_count = viz_df.select(pl.col('year').n_unique()).item()
-                    st.metric("📅 Years", years_count)
+                    st.metric("📅 Years", summary['years'])
                 
                 # STEP 4: QUICK STATS (REMOVED COMPREHENSIVE DATA OVERVIEW)
                 try:
@@ -1364,11 +1679,11 @@ with center:
                     st.subheader("📊 Quick Stats")
                     col1, col2, col3, col4 = st.columns(4)
                     
-                    # LIGHTNING-FAST parallel stats computation
-                    unique_artists = viz_df['artistName'].n_unique()
-                    unique_albums = viz_df['albumName'].n_unique()
-                    unique_tracks = viz_df['trackName'].n_unique()
-                    total_ms_played = viz_df['msPlayed'].sum()
+                    # Computed in the shared collect_all pass above
+                    unique_artists = summary['artists']
+                    unique_albums = summary['albums']
+                    unique_tracks = summary['tracks']
+                    total_ms_played = summary['msPlayed'] or 0
                     
                     with col1:
                         st.metric("🎤 Unique Artists", f"{unique_artists:,}")
@@ -1385,38 +1700,11 @@ with center:
                     fav_col1, fav_col2, fav_col3 = st.columns(3)
                     
                     # Calculate top 3 favorites (excluding unknown values)
-                    top_artists = (viz_df
-                                 .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                 .with_columns([(pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')])
-                                 .group_by('artistName')
-                                 .agg([pl.col('minutesPlayed').sum().alias('totalMinutes')])
-                                 .sort('totalMinutes', descending=True)
-                                 .head(3)
-                                 .select('artistName')
-                                 .to_series()
-                                 .to_list())
+                    top_artists = panels['favorite_artists']['artistName'].cast(pl.Utf8).to_list()
                     
-                    top_albums = (viz_df
-                                .filter(~pl.col('albumName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                .with_columns([(pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')])
-                                .group_by('albumName')
-                                .agg([pl.col('minutesPlayed').sum().alias('totalMinutes')])
-                                .sort('totalMinutes', descending=True)
-                                .head(3)
-                                .select('albumName')
-                                .to_series()
-                                .to_list())
+                    top_albums = panels['favorite_albums']['albumName'].cast(pl.Utf8).to_list()
                     
-                    top_songs = (viz_df
-                               .filter(~pl.col('trackName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                               .with_columns([(pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')])
-                               .group_by('trackName')
-                               .agg([pl.col('minutesPlayed').sum().alias('totalMinutes')])
-                               .sort('totalMinutes', descending=True)
-                               .head(3)
-                               .select('trackName')
-                               .to_series()
-                               .to_list())
+                    top_songs = panels['favorite_tracks']['trackName'].cast(pl.Utf8).to_list()
                     
                     with fav_col1:
                         st.write("**🎤 Favorite Artists:**")
@@ -1444,146 +1732,46 @@ with center:
                 try:
                     st.subheader("📊 Listening Time Trends")
                     
-                    # Check for multiple possible timestamp column names
-                    timestamp_candidates = ['ts', 'endTime', 'played_at', 'timestamp', 'date', 'playedAt', 'end_time']
-                    timestamp_col = None
-                    has_timestamp = False
-                    monthly_success = False
-                    
-                    # Find the first available timestamp column
-                    for col_name in timestamp_candidates:
-                        if col_name in viz_df.columns:
-                            # Test if we have non-null timestamp data
-                            try:
-                                sample_ts = viz_df.select(col_name).filter(pl.col(col_name).is_not_null()).head(5).to_pandas()
-                                if len(sample_ts) > 0:
-                                    timestamp_col = col_name
-                                    has_timestamp = True
-                                    break
-                            except Exception:
-                                continue
+                    # Timestamps were detected and parsed once at ingest (see ingest.timestamp_metadata)
+                    timestamps = get_profile_timestamps(st.session_state.get('selected_profile'))
+                    monthly_minutes = panels['monthly_minutes']
+                    monthly_success = len(monthly_minutes) > 0 and (timestamps is None or timestamps.get('parsed_rows', 0) > 0)
                     
-                    try:
-                        # Try to extract monthly data if we found a timestamp column
-                        if has_timestamp and timestamp_col:
-                                
-                                # Try multiple timestamp parsing approaches for monthly aggregation
-                                monthly_minutes = None
-                                
-                                # Approach 1: Direct string slicing for ISO timestamps (YYYY-MM-DD format)
-                                try:
-                                    monthly_minutes = (viz_df
-                                                     .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                                     .filter(pl.col(timestamp_col).is_not_null())
-                                                     .with_columns([
-                                                         (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed'),
-                                                         pl.col(timestamp_col).cast(pl.Utf8).str.slice(0, 7).alias('year_month')
-                                                     ])
-                                                     .filter(pl.col('year_month').is_not_null())
-                                                     .group_by('year_month')
-                                                     .agg([
-                                                         pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                                     ])
-                                                     .sort('year_month')
-                                                     .to_pandas())
-                                    
-                                    if monthly_minutes is not None and len(monthly_minutes) > 5:  # Need at least 5 months of data
-                                        monthly_success = True
-                                except Exception:
-                                    pass
-                                
-                                # Approach 2: Parse full timestamp and extract year-month
-                                if not monthly_success:
-                                    try:
-                                        monthly_minutes = (viz_df
-                                                         .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                                         .filter(pl.col(timestamp_col).is_not_null())
-                                                         .with_columns([
-                                                             (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed'),
-                                                             pl.col(timestamp_col).cast(pl.Utf8).str.to_date('%Y-%m-%d').dt.strftime('%Y-%m').alias('year_month')
-                                                         ])
-                                                         .filter(pl.col('year_month').is_not_null())
-                                                         .group_by('year_month')
-                                                         .agg([
-                                                             pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                                         ])
-                                                         .sort('year_month')
-                                                         .to_pandas())
-                                        
-                                        if monthly_minutes is not None and len(monthly_minutes) > 5:
-                                            monthly_success = True
-                                    except Exception:
-                                        pass
-                                
-                                # Approach 3: Handle ISO datetime format (with time)
-                                if not monthly_success:
-                                    try:
-                                        monthly_minutes = (viz_df
-                                                         .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                                         .filter(pl.col(timestamp_col).is_not_null())
-                                                         .with_columns([
-                                                             (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed'),
-                                                             pl.col(timestamp_col).cast(pl.Utf8).str.to_datetime().dt.strftime('%Y-%m').alias('year_month')
-                                                         ])
-                                                         .filter(pl.col('year_month').is_not_null())
-                                                         .group_by('year_month')
-                                                         .agg([
-                                                             pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                                         ])
-                                                         .sort('year_month')
-                                                         .to_pandas())
-                                        
-                                        if monthly_minutes is not None and len(monthly_minutes) > 5:
-                                            monthly_success = True
-                                    except Exception:
-                                        pass
-                                
-                                # Success: Show monthly chart with yearly x-axis focus
-                                if monthly_success and monthly_minutes is not None and len(monthly_minutes) > 0:
-                                    monthly_minutes['totalHours'] = monthly_minutes['totalMinutes'] / 60
-                                    
-                                    fig = px.line(monthly_minutes, 
-                                                x='year_month', 
-                                                y='totalMinutes',
-                                                title='Listening Time Trends',
-                                                labels={'totalMinutes': 'Minutes Played', 'year_month': 'Year'},
-                                                height=350)
-                                    
-                                    fig.update_traces(line=dict(width=3, color='#1DB954'))
-                                    fig.update_layout(
-                                        margin=dict(l=0, r=0, t=40, b=0),
-                                        paper_bgcolor='#191414',
-                                        plot_bgcolor='#191414',
-                                        font=dict(color='#FFFFFF'),
-                                        title_font=dict(color='#1DB954', size=16),
-                                        xaxis=dict(
-                                            tickangle=45,
-                                            title='Year',
-                                            gridcolor='#535353',
-                                            color='#FFFFFF'
-                                        ),
-                                        yaxis=dict(
-                                            gridcolor='#535353',
-                                            color='#FFFFFF'
-                                        )
-                                    )
-                                    st.plotly_chart(fig, use_container_width=True)
-                    except Exception:
-                        has_timestamp = False
+                    if monthly_success:
+                        # Monthly aggregation on the integer year/month keys parsed at ingest
+                        monthly_minutes = monthly_minutes.pipe(to_pandas_display)
+                        monthly_minutes['totalHours'] = monthly_minutes['totalMinutes'] / 60
+                        
+                        fig = px.line(monthly_minutes, 
+                                    x='year_month', 
+                                    y='totalMinutes',
+                                    title='Listening Time Trends',
+                                    labels={'totalMinutes': 'Minutes Played', 'year_month': 'Year'},
+                                    height=350)
+                        
+                        fig.update_traces(line=dict(width=3, color='#1DB954'))
+                        fig.update_layout(
+                            margin=dict(l=0, r=0, t=40, b=0),
+                            paper_bgcolor='#191414',
+                            plot_bgcolor='#191414',
+                            font=dict(color='#FFFFFF'),
+                            title_font=dict(color='#1DB954', size=16),
+                            xaxis=dict(
+                                tickangle=45,
+                                title='Year',
+                                gridcolor='#535353',
+                                color='#FFFFFF'
+                            ),
+                            yaxis=dict(
+                                gridcolor='#535353',
+                                color='#FFFFFF'
+                            )
+                        )
+                        st.plotly_chart(fig, use_container_width=True)
                     
-                    # Fallback to yearly data if monthly parsing fails
+                    # Fallback to yearly data when there are no parsed timestamps
                     if not monthly_success:
-                        yearly_minutes = (viz_df
-                                        .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                        .with_columns([
-                                            (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                        ])
-                                        .group_by('year')
-                                        .agg([
-                                            pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                        ])
-                                        .sort('year')
-                                        .to_pandas())
+                        yearly_minutes = panels['yearly_minutes'].pipe(to_pandas_display)
                         
                         if len(yearly_minutes) > 0:
                             yearly_minutes['totalHours'] = yearly_minutes['totalMinutes'] / 60
@@ -1616,18 +1804,7 @@ with center:
                 try:
                     st.subheader("🎤 Top Artists of All Time")
                     
-                    top_artists_minutes = (viz_df
-                                         .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                         .with_columns([
-                                             (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                         ])
-                                         .group_by('artistName')
-                                         .agg([
-                                             pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                         ])
-                                         .sort('totalMinutes', descending=True)
-                                         .head(15)
-                                         .to_pandas())
+                    top_artists_minutes = panels['top_artists'].pipe(to_pandas_display)
                     
                     if len(top_artists_minutes) > 0:
                         top_artists_minutes['totalHours'] = top_artists_minutes['totalMinutes'] / 60
@@ -1662,20 +1839,10 @@ with center:
                     st.subheader("🎵 Top Artists by Year")
                     
                     # Get top artists per year (excluding unknown values)
-                    artists_by_year = (viz_df
-                                     .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                     .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                     .with_columns([
-                                         (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                     ])
-                                     .group_by(['year', 'artistName'])
-                                     .agg([
-                                         pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                     ])
-                                     .sort(['year', 'totalMinutes'], descending=[False, True]))
+                    artists_by_year = get_top_by_year(panels, 'artists_by_year')
                     
                     # Create a selectbox to choose year for treemap
-                    available_years = sorted(viz_df.select('year').drop_nulls().unique().to_series().to_list())
+                    available_years = list(artists_by_year)  # Years with ranked entries
                     if available_years:
                         selected_year = st.selectbox(
                             "Select Year for Top Artists Treemap:",
@@ -1685,10 +1852,7 @@ with center:
                         )
                         
                         # Get top 20 artists for selected year
-                        year_artists = (artists_by_year
-                                      .filter(pl.col('year') == selected_year)
-                                      .head(20)
-                                      .to_pandas())
+                        year_artists = artists_by_year[selected_year].pipe(to_pandas_display)
                         
                         if len(year_artists) > 0:
                             year_artists['totalHours'] = year_artists['totalMinutes'] / 60
@@ -1750,19 +1914,7 @@ with center:
                 try:
                     st.subheader("🎵 Top 25 Tracks All Time")
                     
-                    top_tracks_alltime = (viz_df
-                                        .filter(~pl.col('trackName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                        .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                        .with_columns([
-                                            (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                        ])
-                                        .group_by(['trackName', 'artistName'])
-                                        .agg([
-                                            pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                        ])
-                                        .sort('totalMinutes', descending=True)
-                                        .head(25)
-                                        .to_pandas())
+                    top_tracks_alltime = panels['top_tracks'].pipe(to_pandas_display)
                     
                     if len(top_tracks_alltime) > 0:
                         # Create track labels with artist
@@ -1799,21 +1951,10 @@ with center:
                     st.subheader("🎵 Top Tracks by Year")
                     
                     # Get top tracks per year (excluding unknown values)
-                    tracks_by_year = (viz_df
-                                    .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                    .filter(~pl.col('trackName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                    .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                    .with_columns([
-                                        (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                    ])
-                                    .group_by(['year', 'trackName', 'artistName'])
-                                    .agg([
-                                        pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                    ])
-                                    .sort(['year', 'totalMinutes'], descending=[False, True]))
+                    tracks_by_year = get_top_by_year(panels, 'tracks_by_year')
                     
                     # Create a selectbox to choose year for treemap
-                    available_years = sorted(viz_df.select('year').drop_nulls().unique().to_series().to_list())
+                    available_years = list(tracks_by_year)  # Years with ranked entries
                     if available_years:
                         selected_year = st.selectbox(
                             "Select Year for Top Tracks Treemap:",
@@ -1823,10 +1964,7 @@ with center:
                         )
                         
                         # Get top 20 tracks for selected year
-                        year_tracks = (tracks_by_year
-                                     .filter(pl.col('year') == selected_year)
-                                     .head(20)
-                                     .to_pandas())
+                        year_tracks = tracks_by_year[selected_year].pipe(to_pandas_display)
                         
                         if len(year_tracks) > 0:
                             # Create track labels with artist
@@ -1890,18 +2028,7 @@ with center:
                 try:
                     st.subheader("💿 Top Albums of All Time")
                     
-                    top_albums_minutes = (viz_df
-                                         .filter(~pl.col('albumName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                         .with_columns([
-                                             (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                         ])
-                                         .group_by('albumName')
-                                         .agg([
-                                             pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                         ])
-                                         .sort('totalMinutes', descending=True)
-                                         .head(15)
-                                         .to_pandas())
+                    top_albums_minutes = panels['top_albums'].pipe(to_pandas_display)
                     
                     if len(top_albums_minutes) > 0:
                         top_albums_minutes['totalHours'] = top_albums_minutes['totalMinutes'] / 60
@@ -1936,20 +2063,10 @@ with center:
                     st.subheader("💿 Top Albums by Year")
                     
                     # Get top albums per year (excluding unknown values)
-                    albums_by_year = (viz_df
-                                     .filter(pl.col('year').is_not_null() & (pl.col('year') > 1900))
-                                     .filter(~pl.col('albumName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                     .with_columns([
-                                         (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
-                                     ])
-                                     .group_by(['year', 'albumName'])
-                                     .agg([
-                                         pl.col('minutesPlayed').sum().alias('totalMinutes')
-                                     ])
-                                     .sort(['year', 'totalMinutes'], descending=[False, True]))
+                    albums_by_year = get_top_by_year(panels, 'albums_by_year')
                     
                     # Create a selectbox to choose year for treemap
-                    available_years = sorted(viz_df.select('year').drop_nulls().unique().to_series().to_list())
+                    available_years = list(albums_by_year)  # Years with ranked entries
                     if available_years:
                         selected_year = st.selectbox(
                             "Select Year for Top Albums Treemap:",
@@ -1959,10 +2076,7 @@ with center:
                         )
                         
                         # Get top 20 albums for selected year
-                        year_albums = (albums_by_year
-                                      .filter(pl.col('year') == selected_year)
-                                      .head(20)
-                                      .to_pandas())
+                        year_albums = albums_by_year[selected_year].pipe(to_pandas_display)
                         
                         if len(year_albums) > 0:
                             year_albums['totalHours'] = year_albums['totalMinutes'] / 60
@@ -2027,31 +2141,11 @@ with center:
                     # Calculate artist listening span and intensity
                     try:
                         # Check if we have timestamp data
-                        if 'ts' in viz_df.columns:
-                            artist_loyalty = (viz_df
-                                            .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
-                                            .with_columns([
-                                                (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed'),
-                                                pl.col('ts').cast(pl.Utf8).str.slice(0, 10).alias('date')
-                                            ])
-                                            .group_by('artistName')
-                                            .agg([
-                                                pl.col('date').min().alias('first_listen'),
-                                                pl.col('date').max().alias('last_listen'),
-                                                pl.col('minutesPlayed').sum().alias('totalMinutes'),
-                                                pl.col('date').n_unique().alias('unique_days')
-                                            ])
-                                            .with_columns([
-                                                (pl.col('last_listen').str.to_date() - pl.col('first_listen').str.to_date()).dt.total_days().alias('span_days')
-                                            ])
-                                            .filter(pl.col('totalMinutes') >= 60)  # At least 1 hour of listening
-                                            .sort('totalMinutes', descending=True)
-                                            .head(20)
-                                            .to_pandas())
+                        if 'date' in viz_columns:
+                            artist_loyalty = panels['artist_loyalty'].pipe(to_pandas_display)
                         else:
                             # Fallback: Simple loyalty based on total minutes only (excluding unknown values)
-                            artist_loyalty = (viz_df
-                                            .filter(~pl.col('artistName').str.to_lowercase().is_in(['unknown', 'n/a', '', 'null']))
+                            artist_loyalty = (queries.known_rows(viz_lf, 'artistName')
                                             .with_columns([
                                                 (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed')
                                             ])
@@ -2068,7 +2162,8 @@ with center:
                                             .filter(pl.col('totalMinutes') >= 60)
                                             .sort('totalMinutes', descending=True)
                                             .head(20)
-                                            .to_pandas())
+                                            .collect()
+                                            .pipe(to_pandas_display))
                     except Exception:
                         # Final fallback
                         artist_loyalty = pd.DataFrame()
@@ -2118,6 +2213,70 @@ with center:
                         
                 except Exception as e:
                     st.error(f"Artist Loyalty visualization error: {e}")
+                
+                # LISTENING SESSIONS - Plays grouped into sessions at ingest, split on idle gaps
+                try:
+                    st.subheader("🎧 Listening Sessions")
+                    
+                    profile_name = st.session_state.get('selected_profile')
+                    sessions_path = get_artifact_path(profile_name, 'sessions') if profile_name else None
+                    if sessions_path and os.path.exists(sessions_path):
+                        # Sessions span artists, so only the year filter applies here
+                        session_filters = {'years': active_filters['years']} if 'years' in active_filters else {}
+                        session_panels = get_panel_cache().collect(
+                            profile_name,
+                            get_profile_fingerprint(profile_name),
+                            session_filters,
+                            ['session_summary', 'sessions_by_hour', 'longest_sessions'],
+                            lambda: queries.session_plans(queries.apply_filters(pl.scan_parquet(sessions_path), **session_filters)),
+                            queries.collect_plans,
+                        )
+                        session_summary = session_panels['session_summary'].row(0, named=True)
+                        
+                        if session_summary['sessions'] > 0:
+                            col1, col2, col3, col4 = st.columns(4)
+                            with col1:
+                                st.metric("🎧 Sessions", f"{session_summary['sessions']:,}")
+                            with col2:
+                                st.metric("⏱️ Avg Session", f"{session_summary['avg_minutes']:.0f} min")
+                            with col3:
+                                st.metric("🎵 Avg Tracks", f"{session_summary['avg_tracks']:.1f}")
+                            with col4:
+                                st.metric("⏭️ Skip Rate", f"{session_summary['skip_rate'] * 100:.0f}%")
+                            
+                            sessions_by_hour = session_panels['sessions_by_hour'].to_pandas()
+                            fig = px.bar(sessions_by_hour,
+                                       x='start_hour',
+                                       y='sessions',
+                                       hover_data=['avg_minutes'],
+                                       title=f'Sessions by Start Hour (UTC, new session after {SESSION_GAP_MINUTES} idle minutes)',
+                                       labels={'start_hour': 'Hour of Day', 'sessions': 'Sessions', 'avg_minutes': 'Avg Minutes'},
+                                       height=350,
+                                       color_discrete_sequence=['#1DB954'])
+                            
+                            fig.update_layout(
+                                margin=dict(l=0, r=0, t=40, b=0),
+                                paper_bgcolor='#191414',
+                                plot_bgcolor='#191414',
+                                font=dict(color='#FFFFFF'),
+                                title_font=dict(color='#1DB954', size=16),
+                                xaxis=dict(gridcolor='#535353', color='#FFFFFF', dtick=1),
+                                yaxis=dict(gridcolor='#535353', color='#FFFFFF')
+                            )
+                            st.plotly_chart(fig, use_container_width=True)
+                            
+                            st.write("**Longest Sessions:**")
+                            longest = session_panels['longest_sessions'].to_pandas()
+                            longest.columns = ['Start', 'End', 'Minutes', 'Tracks', 'Skips', 'Platform']
+                            longest['Minutes'] = longest['Minutes'].round(0).astype(int)
+                            st.dataframe(longest, use_container_width=True, height=300)
+                        else:
+                            st.info("No listening sessions in the selected years")
+                    else:
+                        st.info("No session data available")
+                        
+                except Exception as e:
+                    st.error(f"Listening Sessions visualization error: {e}")
 
                 # TOP 25 SONGS IN MOST PLAYLISTS - Songs that appear across multiple playlists
                 show_songs_in_most_playlists()
@@ -2130,22 +2289,24 @@ with center:
                     profile_name = st.session_state.get('selected_profile')
                     if profile_name:
                         try:
-                            import os
-                            import polars as pl
-                            
-                            # Try to load playlist data from cache
-                            playlist_path = os.path.join(CACHE_DIR, f"{profile_name}_playlists.parquet")
-                            
-
+                            # Real minutes: playlist items hash-joined with the play log on a normalized (track, artist) key
+                            playlist_tracks_path = get_artifact_path(profile_name, 'playlist_tracks')
                             
-                            if os.path.exists(playlist_path):
+                            if os.path.exists(playlist_tracks_path):
                                 try:
-                                    # Load playlist data
-                                    playlist_df = pl.read_parquet(playlist_path).to_pandas()
+                                    playlist_df = get_panel_cache().collect(
+                                        profile_name,
+                                        get_profile_fingerprint(profile_name),
+                                        {},
+                                        ['playlist_minutes'],
+                                        lambda: {'playlist_minutes': queries.playlist_minutes_plan(
+                                            get_playlist_plays(profile_name, lf), pl.scan_parquet(playlist_tracks_path))},
+                                        queries.collect_plans,
+                                    )['playlist_minutes'].to_pandas()
                                     
                                     if len(playlist_df) > 0:
-                                        # Sort by total minutes and get top 10
-                                        top_playlists = playlist_df.nlargest(10, 'totalMinutes')
+                                        # Already sorted by total minutes, top 10
+                                        top_playlists = playlist_df
                                         top_playlists['totalHours'] = top_playlists['totalMinutes'] / 60
                                         
                                         # Create horizontal bar chart
@@ -2171,8 +2332,8 @@ with center:
                                         
                                         # Show detailed playlist info
                                         st.write("**Playlist Details:**")
-                                        display_playlists = top_playlists[['playlistName', 'totalMinutes', 'trackCount', 'totalHours']].copy()
-                                        display_playlists.columns = ['Playlist Name', 'Total Minutes', 'Track Count', 'Total Hours']
+                                        display_playlists = top_playlists[['playlistName', 'totalMinutes', 'distinctTracks', 'playedTracks', 'totalHours']].copy()
+                                        display_playlists.columns = ['Playlist Name', 'Total Minutes', 'Distinct Tracks', 'Tracks Played', 'Total Hours']
                                         display_playlists['Total Minutes'] = display_playlists['Total Minutes'].round(0).astype(int)
                                         display_playlists['Total Hours'] = display_playlists['Total Hours'].round(1)
                                         st.dataframe(display_playlists, use_container_width=True, height=300)
@@ -2201,9 +2362,9 @@ with center:
             try:
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("📊 Total Records", f"{len(df):,}")
+                    st.metric("📊 Total Records", f"{st.session_state.get('profile_records', 0):,}")
                 with col2:
-                    unique_artists = len(df.select('artistName').unique())
+                    unique_artists = lf.select(pl.col('artistName').n_unique()).collect().item()
                     st.metric("🎤 Unique Artists", f"{unique_artists:,}")
             except Exception as e:
                 st.write(f"Stats error: {e}")
@@ -2211,6 +2372,53 @@ with center:
     else:
         st.info("🎯 Select a profile from the right panel to load your Spotify data.")
 
+def poll_profile_load(profile_name, empty_message):
+    """Right panel: follow the background ingest job, then load the profile once it has finished"""
+    job = get_job_registry().get(profile_name)
+    if job is None:
+        job = start_ingest_job(profile_name)  # e.g. server restarted since the click
+    if not job.done:
+        show_ingest_job_progress(job)
+        time.sleep(INGEST_POLL_SECONDS)
+        st.rerun()
+    
+    if job.state == jobs.CANCELLED:
+        st.warning("Ingest cancelled - the existing cache was left untouched.")
+        st.session_state['profile_loading'] = False
+        return
+    if job.state == jobs.FAILED:
+        st.error(f"Ingest failed: {job.error}")
+        st.session_state['profile_loading'] = False
+        return
+    
+    # ULTRA-AGGRESSIVE MODE - Data only, filters deferred (the cache is fresh, so this only reads)
+    lf = load_profile_data_turbo_enhanced(profile_name)
+    st.session_state['lf'] = lf
+    st.session_state['profile_records'] = get_profile_record_count(profile_name) if lf is not None else 0
+    
+    if lf is not None:
+        # DEFERRED FILTERS: Set minimal defaults, compute on-demand
+        st.session_state['year_filter'] = []
+        st.session_state['artist_filter'] = []
+        st.session_state['album_filter'] = []
+        st.session_state['song_filter'] = []
+        st.session_state['_filters_computed'] = False  # Mark as not computed yet
+        
+        st.session_state['apply_filters'] = True
+        st.session_state['profile_ready'] = True
+        st.session_state['filters_ready'] = True
+        
+        # END TIMING - Data loaded, filters will compute on-demand
+        if 'profile_start_time' in st.session_state:
+            del st.session_state['profile_start_time']
+    else:
+        st.warning(empty_message)
+        st.session_state['profile_ready'] = False
+        st.session_state['filters_ready'] = False
+    
+    st.session_state['profile_loading'] = False
+    st.rerun()
+
 # --- Right Panel: Profile Management ---
 with right:
     st.header("Profiles")
@@ -2226,7 +2434,7 @@ with right:
     if profile_mode != st.session_state['last_profile_mode']:
         # Clear all relevant session state variables
         for key in [
-            'df', 'year_filter', 'artist_filter', 'album_filter', 'song_filter',
+            'lf', 'profile_records', 'year_filter', 'artist_filter', 'album_filter', 'song_filter',
             'apply_filters', 'filters_ready', 'profile_ready', 'profile_loading',
             'selected_profile', 'created_profile', 'show_upload', 'uploaded_files',
             'reset_filters', 'last_profile', 'profile_select', 'profile_upload',
@@ -2280,14 +2488,14 @@ with right:
         if st.session_state['show_upload'] and profile_name:
             uploaded_files = st.file_uploader(
                 "Upload Spotify JSON files",
-                type=["json"],
+                type=["json", "zip"],
                 accept_multiple_files=True,
                 key="profile_upload"
             )
             if uploaded_files:
                 if st.button("Upload Files & Save to Profile", key="upload_files_btn"):
-                    save_uploaded_files(profile_name, uploaded_files)
-                    st.success("Files Upload Completed & Profile Saved", icon="✅")
+                    saved_count, skipped_count = save_uploaded_files(profile_name, uploaded_files)
+                    st.success(f"Files Upload Completed & Profile Saved ({saved_count} saved, {skipped_count} unchanged)", icon="✅")
                     
                     # Immediately load the data and enable all functionality
                     st.session_state['created_profile'] = profile_name
@@ -2299,33 +2507,14 @@ with right:
                     start_time = time.time()
                     st.session_state['profile_start_time'] = start_time
                     
-                    # Load data immediately with comprehensive system
-                    df = load_profile_data_turbo_enhanced(profile_name)
-                    st.session_state['df'] = df
-                    
-                    if not df.is_empty():
-                        # Set up filters and enable dashboard
-                        st.session_state['year_filter'] = []
-                        st.session_state['artist_filter'] = []
-                        st.session_state['album_filter'] = []
-                        st.session_state['song_filter'] = []
-                        st.session_state['_filters_computed'] = False
-                        
-                        st.session_state['apply_filters'] = True
-                        st.session_state['profile_ready'] = True
-                        st.session_state['filters_ready'] = True
-                        st.session_state['profile_loading'] = False
-                        
-                        # END TIMING - Data loaded
-                        if 'profile_start_time' in st.session_state:
-                            del st.session_state['profile_start_time']
-                    else:
-                        st.warning("No data found in uploaded files.")
-                        st.session_state['profile_ready'] = False
-                        st.session_state['filters_ready'] = False
-                    
-                    # Immediately rerun to show the dashboard
+                    # Ingest in the background; progress is polled below
+                    start_ingest_job(profile_name)
+                    st.session_state['profile_loading'] = True
+                    st.session_state['profile_ready'] = False
+                    st.session_state['filters_ready'] = False
                     st.rerun()
+        if st.session_state.get('profile_loading') and not st.session_state.get('filters_ready') and st.session_state.get('selected_profile'):
+            poll_profile_load(st.session_state['selected_profile'], "No data found in uploaded files.")
         if st.session_state.get('created_profile'):
             selected_profile = st.session_state['created_profile']
     elif profile_mode == "Select a Pre-Existing Profile":
@@ -2362,8 +2551,10 @@ with right:
             st.session_state['profile_loading'] = True
             st.session_state['profile_ready'] = False
             st.session_state['filters_ready'] = False
+            start_ingest_job(selected_profile_dropdown)
         if delete_clicked and selected_profile_dropdown and selected_profile_dropdown != "No profiles found":
             try:
+                delete_profile_cache(selected_profile_dropdown)
                 shutil.rmtree(os.path.join(PROFILE_DIR, selected_profile_dropdown))
                 st.success(f"Profile '{selected_profile_dropdown}' deleted.")
                 st.session_state['profile_ready'] = False
@@ -2373,40 +2564,17 @@ with right:
                 st.error(f"Error deleting profile: {e}")
         # Show loading or ready notification in the right panel, never both
         if st.session_state['profile_loading'] and not st.session_state['filters_ready']:
-            # ULTRA-AGGRESSIVE MODE - Data only, filters deferred
-            profile_name = st.session_state.get('selected_profile')
-            
-            # Load data silently with comprehensive system
-            df = load_profile_data_turbo_enhanced(profile_name)
-            st.session_state['df'] = df
-            
-            if not df.is_empty():
-                # DEFERRED FILTERS: Set minimal defaults, compute on-demand
-                st.session_state['year_filter'] = []
-                st.session_state['artist_filter'] = []
-                st.session_state['album_filter'] = []
-                st.session_state['song_filter'] = []
-                st.session_state['_filters_computed'] = False  # Mark as not computed yet
-                
-                st.session_state['apply_filters'] = True
-                st.session_state['profile_ready'] = True
-                st.session_state['filters_ready'] = True
-                
-                # END TIMING - Data loaded, filters will compute on-demand
-                if 'profile_start_time' in st.session_state:
-                    del st.session_state['profile_start_time']
-            else:
-                st.warning("No data found in profile.")
-                st.session_state['profile_ready'] = False
-                st.session_state['filters_ready'] = False
-            
-            st.session_state['profile_loading'] = False
-            st.rerun()
+            poll_profile_load(st.session_state.get('selected_profile'), "No data found in profile.")
         elif st.session_state['filters_ready']:
             st.success("✅ Ready!")
-            df = st.session_state.get('df', pl.DataFrame())
-            if not df.is_empty():
-                st.write(f"📊 {len(df):,} records loaded")
+            if st.session_state.get('lf') is not None:
+                st.write(f"📊 {st.session_state.get('profile_records', 0):,} records loaded")
+                ingest_report = get_additional_data_from_session(st.session_state.get('selected_profile')).get('ingest_report', [])
+                if ingest_report:
+                    with st.expander("📥 Ingest Report", expanded=False):
+                        report_df = pd.DataFrame(ingest_report)
+                        report_df.columns = ['File', 'Rows Read', 'Rows Written']
+                        st.dataframe(report_df, use_container_width=True, hide_index=True)
 
 
 
@@ -2416,11 +2584,10 @@ with left:
     st.markdown('<h3 style="margin-bottom: 0.5rem; color: #1f77b4;">🎛️ Filters</h3>', unsafe_allow_html=True)
     # Only show filters if profile is ready and data is loaded
     if st.session_state.get('filters_ready', False):
-        df = st.session_state.get('df', pl.DataFrame())
-        if not df.is_empty():
-            pdf = df.to_pandas()
-            # Only show warning if DataFrame is truly empty
-            if len(pdf) == 0:
+        lf = st.session_state.get('lf')
+        if lf is not None:
+            # Only show warning if the dataset is truly empty
+            if st.session_state.get('profile_records', 0) == 0:
                 st.warning('Profile data is empty. Please check your uploaded files.')
             else:
                 # ON-DEMAND FILTER COMPUTATION - Only compute when filters are accessed
@@ -2430,7 +2597,7 @@ with left:
                 if not st.session_state.get('_filters_computed', False):
                     # Compute filters now (deferred from initial load)
                     with st.spinner("⚡ Computing filters..."):
-                        filters = prepare_filters_turbo(df, profile_name)
+                        filters = prepare_filters_turbo(lf, profile_name)
                         st.session_state['_filter_years'] = filters['years']
                         st.session_state['_filter_artists'] = filters['artists']
                         st.session_state['_filter_albums'] = filters['albums']
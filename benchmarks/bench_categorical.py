@@ -0,0 +1,79 @@
+"""Resident memory and group-by latency: Utf8 vs Categorical name columns.
+
+Each storage mode is loaded from parquet in a fresh subprocess so the RSS
+numbers are comparable.
+
+    python benchmarks/bench_categorical.py --rows 5000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import polars as pl  # noqa: E402
+
+import ingest  # noqa: E402
+from synthetic import synthetic_profile_frame  # noqa: E402
+
+GROUP_KEYS = ['artistName', 'albumName', 'trackName', 'platform']
+
+
+def _rss_mb():
+    """Current resident set size (Linux /proc), falling back to the peak elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except OSError:
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1 << 20)
+
+
+def run_mode(path, repeats):
+    before = _rss_mb()
+    df = pl.read_parquet(path)
+    loaded = _rss_mb()
+    timings = {}
+    for key in GROUP_KEYS:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            df.group_by(key).agg(pl.col('msPlayed').sum()).sort('msPlayed', descending=True).head(15)
+        timings[key] = (time.perf_counter() - start) / repeats * 1000
+    print(json.dumps({'frame_mb': df.estimated_size('mb'), 'rss_delta_mb': loaded - before, 'group_by_ms': timings}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        run_mode(args.path, args.repeats)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        frame = synthetic_profile_frame(args.rows)
+        utf8_path = os.path.join(tmp, 'utf8.parquet')
+        frame.write_parquet(utf8_path)
+        cat_path = os.path.join(tmp, 'categorical.parquet')
+        ingest.assemble_parquet([utf8_path], cat_path, categorical_columns=ingest.CATEGORICAL_COLUMNS)
+        del frame
+
+        print(f"{args.rows:,} rows")
+        for label, path in (('Utf8', utf8_path), ('Categorical', cat_path)):
+            out = subprocess.run([sys.executable, __file__, '--path', path, '--repeats', str(args.repeats)],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            group_by = '  '.join(f"{k}={v:.1f}ms" for k, v in result['group_by_ms'].items())
+            print(f"  {label:<12} frame={result['frame_mb']:>8.1f} MB  RSS +{result['rss_delta_mb']:>8.1f} MB  {group_by}")
+
+
+if __name__ == '__main__':
+    main()
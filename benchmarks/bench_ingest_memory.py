@@ -0,0 +1,71 @@
+"""Peak-memory benchmark: json.load ingest vs the incremental streaming parser.
+
+Each mode runs in a fresh subprocess so ``ru_maxrss`` reflects only that mode.
+
+    python benchmarks/bench_ingest_memory.py --records 1500000
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest  # noqa: E402
+from synthetic import write_extended_export  # noqa: E402
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1 << 20)
+
+
+def run_mode(mode, path):
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'json_load':
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            data = json.load(f)
+        frame = ingest.streaming_records_to_frame(data)
+        del data
+    else:
+        frame = ingest.pl.concat(list(ingest.iter_streaming_batches(path)), how='vertical')
+    elapsed = time.perf_counter() - start
+    rows = len(frame)
+    del frame
+    gc.collect()
+    print(json.dumps({'mode': mode, 'rows': rows, 'seconds': round(elapsed, 2),
+                      'peak_rss_mb': round(_peak_rss_mb(), 1), 'baseline_rss_mb': round(baseline, 1)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=1500000, help="plays in the synthetic 10-year export")
+    parser.add_argument('--mode', choices=['json_load', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_extended_export(tmp, args.records, n_files=1, years=10)[0]
+        size_mb = os.path.getsize(path) / (1 << 20)
+        print(f"Synthetic 10-year export: {args.records:,} records, {size_mb:.1f} MB")
+        for mode in ('json_load', 'streaming'):
+            out = subprocess.run([sys.executable, __file__, '--mode', mode, '--path', path],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"  {mode:<10} rows={result['rows']:>10,}  time={result['seconds']:>7.2f}s  "
+                  f"peak RSS={result['peak_rss_mb']:>8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Scaling benchmark for parallel per-file StreamingHistory ingestion.
+
+    python benchmarks/bench_ingest_parallel.py --files 16 --records-per-file 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest  # noqa: E402
+from synthetic import write_extended_export  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--records-per-file', type=int, default=50000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_extended_export(tmp, args.files * args.records_per_file, n_files=args.files)
+        total_mb = sum(os.path.getsize(p) for p in paths) / (1 << 20)
+        print(f"{args.files} files, {args.files * args.records_per_file:,} records, {total_mb:.1f} MB "
+              f"({os.cpu_count()} CPUs)")
+
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            fragment_dirs = [os.path.join(tmp, f"fragments-{workers}", str(i)) for i in range(len(paths))]
+            reports = ingest.build_fragments(paths, fragment_dirs, max_workers=workers)
+            rows = sum(r["rows_written"] for r in reports)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  max_workers={workers:<2}  rows={rows:>10,}  time={elapsed:>7.2f}s  "
+                  f"speedup={baseline / elapsed:>5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""File size, cold-read and filtered-scan latency for each parquet write profile.
+
+Every profile writes the same synthetic profile as a year-partitioned dataset.
+Reads run in a fresh subprocess so no Polars state is shared between
+profiles (the OS page cache is not dropped).
+
+    python benchmarks/bench_parquet_profiles.py --rows 5000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import polars as pl  # noqa: E402
+
+import ingest  # noqa: E402
+from synthetic import synthetic_profile_frame  # noqa: E402
+
+# Polars' own defaults, for comparison with the tuned profiles
+LIBRARY_DEFAULTS = {'compression': 'zstd', 'compression_level': None, 'row_group_size': None, 'statistics': True}
+
+
+def _dir_mb(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / (1 << 20)
+
+
+def run_reads(dataset_dir, repeats):
+    """Cold full read, then a one-month filtered scan that relies on row-group statistics"""
+    start = time.perf_counter()
+    df = ingest.scan_partitioned_dataset(dataset_dir).collect()
+    cold_ms = (time.perf_counter() - start) * 1000
+    year = int(df['year'].drop_nulls().median())
+    del df
+
+    month_start = datetime(year, 6, 1, tzinfo=timezone.utc)
+    month_end = datetime(year, 7, 1, tzinfo=timezone.utc)
+    query = (ingest.scan_partitioned_dataset(dataset_dir)
+             .filter((pl.col('year') == year) & (pl.col('ts') >= month_start) & (pl.col('ts') < month_end))
+             .group_by('artistName')
+             .agg(pl.col('msPlayed').sum())
+             .sort('msPlayed', descending=True)
+             .head(15))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        query.collect()
+    filtered_ms = (time.perf_counter() - start) / repeats * 1000
+    print(json.dumps({'cold_read_ms': cold_ms, 'filtered_scan_ms': filtered_ms}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--profiles', nargs='+', default=list(ingest.PARQUET_WRITE_PROFILES))
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        run_reads(args.path, args.repeats)
+        return
+
+    profiles = {'library-defaults': LIBRARY_DEFAULTS}
+    profiles.update({name: ingest.PARQUET_WRITE_PROFILES[name] for name in args.profiles})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'source.parquet')
+        synthetic_profile_frame(args.rows).write_parquet(source)
+
+        print(f"{args.rows:,} rows")
+        for name, profile in profiles.items():
+            dataset_dir = os.path.join(tmp, name)
+            start = time.perf_counter()
+            ingest.assemble_partitioned_dataset([source], dataset_dir,
+                                                categorical_columns=ingest.CATEGORICAL_COLUMNS,
+                                                write_profile=profile)
+            write_s = time.perf_counter() - start
+            out = subprocess.run([sys.executable, __file__, '--path', dataset_dir, '--repeats', str(args.repeats)],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"  {name:<17} size={_dir_mb(dataset_dir):>8.1f} MB  write={write_s:>6.2f}s  "
+                  f"cold read={result['cold_read_ms']:>8.1f}ms  filtered scan={result['filtered_scan_ms']:>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Quick Stats latency: seven eager passes vs the fused collect_all plan.
+
+The eager variant is the original dashboard code: three ``n_unique`` calls, a
+``sum`` and three filter/derive/group-by pipelines over the same frame. The
+fused variant collects ``queries.quick_stats_plans`` in one ``collect_all``.
+
+    python benchmarks/bench_quick_stats.py --rows 1000000 5000000 20000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import polars as pl  # noqa: E402
+
+import ingest  # noqa: E402
+import queries  # noqa: E402
+from synthetic import synthetic_profile_frame  # noqa: E402
+
+
+def eager_quick_stats(df):
+    """The seven-pass version this benchmark replaces"""
+    stats = {
+        'artists': df['artistName'].n_unique(),
+        'albums': df['albumName'].n_unique(),
+        'tracks': df['trackName'].n_unique(),
+        'msPlayed': df['msPlayed'].sum(),
+    }
+    for column in queries.NAME_COLUMNS:
+        stats[column] = (df
+                         .filter(~pl.col(column).cast(pl.Utf8).str.to_lowercase().is_in(queries.PLACEHOLDER_NAMES))
+                         .with_columns([(pl.col('msPlayed') / queries.MS_PER_MINUTE).alias('minutesPlayed')])
+                         .group_by(column)
+                         .agg([pl.col('minutesPlayed').sum().alias('totalMinutes')])
+                         .sort('totalMinutes', descending=True)
+                         .head(3)
+                         .select(column)
+                         .to_series()
+                         .to_list())
+    return stats
+
+
+def fused_quick_stats(lf):
+    return queries.collect_plans(queries.quick_stats_plans(lf))
+
+
+def _time_ms(fn, repeats):
+    fn()  # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 5000000, 20000000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            source = os.path.join(tmp, f"source-{rows}.parquet")
+            synthetic_profile_frame(rows).write_parquet(source)
+            path = os.path.join(tmp, f"profile-{rows}.parquet")
+            ingest.assemble_parquet([source], path, categorical_columns=ingest.CATEGORICAL_COLUMNS)
+            os.remove(source)
+
+            df = pl.read_parquet(path)
+            eager_ms = _time_ms(lambda: eager_quick_stats(df), args.repeats)
+            fused_mem_ms = _time_ms(lambda: fused_quick_stats(df.lazy()), args.repeats)
+            del df
+            fused_scan_ms = _time_ms(lambda: fused_quick_stats(pl.scan_parquet(path)), args.repeats)
+            os.remove(path)
+
+            print(f"{rows:>12,} rows  eager 7-pass={eager_ms:>8.1f}ms  fused in-memory={fused_mem_ms:>8.1f}ms "
+                  f"({eager_ms / fused_mem_ms:.1f}x)  fused incl. parquet scan={fused_scan_ms:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
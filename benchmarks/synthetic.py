@@ -0,0 +1,107 @@
+"""Synthetic Spotify export generator shared by the benchmark scripts."""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+PLATFORMS = ['android', 'ios', 'windows', 'web_player', 'osx']
+REASONS_START = ['trackdone', 'clickrow', 'fwdbtn', 'playbtn', 'appload']
+REASONS_END = ['trackdone', 'fwdbtn', 'endplay', 'logout', 'backbtn']
+COUNTRIES = ['US', 'GB', 'DE', 'SE', 'CA']
+
+
+def _catalog(rng, n_artists=3000, albums_per_artist=4, tracks_per_album=10):
+    """Build a (track, artist, album) catalog with a long-tail popularity skew"""
+    catalog = []
+    for a in range(n_artists):
+        for b in range(albums_per_artist):
+            for t in range(tracks_per_album):
+                catalog.append((f"Track {a}-{b}-{t}", f"Artist {a}", f"Album {a}-{b}"))
+    rng.shuffle(catalog)
+    return catalog
+
+
+def iter_extended_records(n_records, years=10, seed=42):
+    """Yield extended-history records spread evenly over ``years`` years"""
+    rng = random.Random(seed)
+    catalog = _catalog(rng)
+    start = datetime(2024 - years, 1, 1)
+    step = timedelta(seconds=(years * 365.25 * 86400) / max(n_records, 1))
+    for i in range(n_records):
+        track, artist, album = catalog[min(int(rng.paretovariate(1.2)) - 1, len(catalog) - 1) if rng.random() < 0.5 else rng.randrange(len(catalog))]
+        ts = start + step * i
+        yield {
+            'ts': ts.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'platform': rng.choice(PLATFORMS),
+            'ms_played': rng.randint(0, 360000),
+            'conn_country': rng.choice(COUNTRIES),
+            'master_metadata_track_name': track,
+            'master_metadata_album_artist_name': artist,
+            'master_metadata_album_album_name': album,
+            'spotify_track_uri': f"spotify:track:{i:022d}",
+            'reason_start': rng.choice(REASONS_START),
+            'reason_end': rng.choice(REASONS_END),
+            'shuffle': rng.random() < 0.4,
+            'skipped': rng.random() < 0.2,
+            'offline': rng.random() < 0.05,
+        }
+
+
+def write_extended_export(directory, n_records, n_files=1, years=10, seed=42):
+    """Write ``n_records`` synthetic plays as ``n_files`` Streaming_History_Audio_*.json files"""
+    os.makedirs(directory, exist_ok=True)
+    per_file = -(-n_records // n_files)
+    paths = []
+    records = iter_extended_records(n_records, years=years, seed=seed)
+    for i in range(n_files):
+        path = os.path.join(directory, f"Streaming_History_Audio_{i}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[\n')
+            for j, record in enumerate(r for _, r in zip(range(per_file), records)):
+                if j:
+                    f.write(',\n')
+                json.dump(record, f)
+            f.write('\n]')
+        paths.append(path)
+    return paths
+
+
+def synthetic_profile_frame(n_rows, years=10, n_artists=20000, seed=42):
+    """Build a normalized profile frame (ingest schema) directly in Polars.
+
+    Much faster than writing and parsing JSON, for benchmarks that start
+    from an already-ingested profile.
+    """
+    import numpy as np
+    import polars as pl
+
+    import ingest
+
+    rng = np.random.default_rng(seed)
+    # Zipf-like popularity: a few artists dominate, long tail of the rest
+    artist = np.minimum(rng.zipf(1.3, n_rows), n_artists) - 1
+    album = artist * 8 + rng.integers(0, 8, n_rows)
+    track = album * 12 + rng.integers(0, 12, n_rows)
+    start = np.datetime64(f"{2024 - years}-01-01T00:00:00")
+    offsets = np.sort(rng.integers(0, int(years * 365.25 * 86400), n_rows)).astype('timedelta64[s]')
+    ts = np.datetime_as_string(start + offsets, unit='s')
+
+    raw = pl.DataFrame({
+        'ts': pl.Series(ts).str.replace(r'$', 'Z'),
+        'master_metadata_track_name': pl.Series(track).cast(pl.Utf8).str.replace(r'^', 'Track '),
+        'master_metadata_album_artist_name': pl.Series(artist).cast(pl.Utf8).str.replace(r'^', 'Artist '),
+        'master_metadata_album_album_name': pl.Series(album).cast(pl.Utf8).str.replace(r'^', 'Album '),
+        'ms_played': rng.integers(0, 360000, n_rows).astype('float64'),
+        'platform': np.array(PLATFORMS)[rng.integers(0, len(PLATFORMS), n_rows)],
+        'skipped': rng.random(n_rows) < 0.2,
+        'shuffle': rng.random(n_rows) < 0.4,
+        'offline': rng.random(n_rows) < 0.05,
+        'reason_start': np.array(REASONS_START)[rng.integers(0, len(REASONS_START), n_rows)],
+        'reason_end': np.array(REASONS_END)[rng.integers(0, len(REASONS_END), n_rows)],
+        'conn_country': np.array(COUNTRIES)[rng.integers(0, len(COUNTRIES), n_rows)],
+    })
+    raw = raw.with_columns([
+        pl.lit(None, dtype=dtype).alias(name)
+        for name, dtype in ingest.RAW_STREAMING_SCHEMA.items() if name not in raw.columns
+    ]).select(list(ingest.RAW_STREAMING_SCHEMA))
+    return ingest.finalize_streaming_frame(ingest.normalize_streaming_frame(raw))
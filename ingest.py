@@ -0,0 +1,996 @@
+"""Spotify export ingestion helpers."""
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import polars as pl
+
+# STREAMING PARSER SETTINGS
+STREAM_READ_CHUNK_CHARS = 1 << 20  # Characters pulled from disk per read
+STREAM_BATCH_RECORDS = 50000  # Records buffered before a columnar batch is emitted
+_ARRAY_DELIMITERS = frozenset(' \t\r\n,]')
+
+# PARALLEL INGEST SETTINGS
+DEFAULT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# PARQUET WRITE PROFILES: codec, level, rows per row group and column statistics.
+# Smaller row groups let min/max statistics skip more data on filtered scans
+# at the cost of a slightly larger file.
+PARQUET_WRITE_PROFILES = {
+    'balanced': {'compression': 'zstd', 'compression_level': 3, 'row_group_size': 128 * 1024, 'statistics': True},
+    'compact': {'compression': 'zstd', 'compression_level': 12, 'row_group_size': 512 * 1024, 'statistics': True},
+    'fast': {'compression': 'lz4', 'compression_level': None, 'row_group_size': 128 * 1024, 'statistics': True},
+    'snappy': {'compression': 'snappy', 'compression_level': None, 'row_group_size': 128 * 1024, 'statistics': True},
+}
+DEFAULT_WRITE_PROFILE = 'balanced'
+FRAGMENT_WRITE_PROFILE = 'fast'  # Intermediate per-file parts: cheap to write, re-read once per rebuild
+
+# Bump whenever the normalized layout changes so cached fragments are rebuilt
+SCHEMA_VERSION = 5
+
+# Column layout of a normalized streaming-history batch
+STREAMING_SCHEMA = {
+    'trackName': pl.Utf8,
+    'artistName': pl.Utf8,
+    'albumName': pl.Utf8,
+    'msPlayed': pl.Float64,
+    'ts': pl.Datetime('ms', 'UTC'),
+    'ts_format': pl.Int8,  # Index into TIMESTAMP_FORMATS of the layout ts was parsed with (null if none)
+    'platform': pl.Utf8,
+    'skipped': pl.Boolean,
+    'shuffle': pl.Boolean,
+    'offline': pl.Boolean,
+    'reason_start': pl.Utf8,
+    'reason_end': pl.Utf8,
+    'conn_country': pl.Utf8,
+    'year': pl.Int32,
+    'month': pl.Int8,
+    'day': pl.Int8,
+    'hour': pl.Int8,
+    'weekday': pl.Int8,  # ISO weekday, Monday = 1
+    'date': pl.Date,
+}
+
+# Placeholder names Spotify writes for missing metadata (compared lowercased)
+PLACEHOLDER_NAMES = ['unknown', 'n/a', '', 'null']
+
+# Name column -> boolean column flagging a real (non-placeholder, non-null) name, computed once at ingest
+VALID_NAME_COLUMNS = {'artistName': 'artist_valid', 'albumName': 'album_valid', 'trackName': 'track_valid'}
+
+# High-repetition string columns stored dictionary-encoded in the profile dataset
+CATEGORICAL_COLUMNS = ['artistName', 'albumName', 'trackName', 'platform', 'reason_start', 'reason_end', 'conn_country']
+
+# Export timestamp layouts: extended history (ISO-8601, UTC) and legacy
+# StreamingHistory endTime ("YYYY-MM-DD HH:MM", also UTC)
+TIMESTAMP_FORMATS = [
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%dT%H:%M:%S%.fZ',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+]
+
+
+def parquet_write_options(profile=None):
+    """Keyword arguments for write_parquet/sink_parquet from a profile name or dict"""
+    if profile is None:
+        profile = DEFAULT_WRITE_PROFILE
+    if isinstance(profile, str):
+        profile = PARQUET_WRITE_PROFILES[profile]
+    return {k: v for k, v in profile.items() if v is not None}
+
+
+def write_parquet(df, path, profile=None):
+    """Write an eager frame with the given write profile (atomically: temp file, then rename)"""
+    tmp_path = path + '.tmp'
+    try:
+        df.write_parquet(tmp_path, **parquet_write_options(profile))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def sink_parquet(lf, path, profile=None):
+    """Stream a LazyFrame to parquet with the given write profile"""
+    lf.sink_parquet(path, **parquet_write_options(profile))
+
+
+class IngestCancelled(Exception):
+    """Raised from a progress callback to stop an ingest between batches"""
+
+
+# ZIP EXPORTS: archive members are addressed as "<archive path>::<member name>"
+# and read straight out of the archive, never extracted to disk
+ZIP_MEMBER_SEPARATOR = '::'
+
+
+def split_source(path):
+    """``(file path, member name)`` of a source; member is None for plain files"""
+    archive, sep, member = path.partition(ZIP_MEMBER_SEPARATOR)
+    return (archive, member) if sep else (path, None)
+
+
+def source_name(path):
+    """File name used to route a source (plain file or zip member) to its parser"""
+    archive, member = split_source(path)
+    return os.path.basename(member if member is not None else archive)
+
+
+def zip_json_members(archive_path):
+    """JSON members of an export zip, skipping directories and macOS metadata"""
+    with zipfile.ZipFile(archive_path) as zf:
+        return [
+            info.filename for info in zf.infolist()
+            if not info.is_dir() and info.filename.lower().endswith('.json')
+            and not info.filename.startswith('__MACOSX/') and not os.path.basename(info.filename).startswith('._')
+        ]
+
+
+@contextlib.contextmanager
+def open_source(path, text=False):
+    """Open a plain file or zip member as a binary (or utf-8 text) stream"""
+    archive, member = split_source(path)
+    if member is None:
+        with (open(path, 'r', encoding='utf-8', errors='ignore') if text else open(path, 'rb')) as f:
+            yield f
+        return
+    with zipfile.ZipFile(archive) as zf, zf.open(member) as raw:
+        yield io.TextIOWrapper(raw, encoding='utf-8', errors='ignore') if text else raw
+
+
+def source_size(path):
+    """Uncompressed size in bytes of a plain file or zip member"""
+    archive, member = split_source(path)
+    if member is None:
+        return os.path.getsize(path)
+    with zipfile.ZipFile(archive) as zf:
+        return zf.getinfo(member).file_size
+
+
+def load_json_source(path):
+    """json.load a plain file or zip member"""
+    with open_source(path, text=True) as f:
+        return json.load(f)
+
+
+def is_streaming_history_file(fname):
+    """True for the StreamingHistory / Streaming_History exports"""
+    return 'Streaming_History' in fname or 'StreamingHistory' in fname
+
+
+def iter_json_array(fp, chunk_size=STREAM_READ_CHUNK_CHARS):
+    """Incrementally yield the elements of a top-level JSON array.
+
+    Reads ``fp`` in ``chunk_size`` pieces and decodes one element at a time,
+    so only the current chunk and the element being decoded live in memory.
+    Documents that are not arrays are decoded whole; a single object is
+    yielded as-is.
+    """
+    decoder = json.JSONDecoder()
+    buf = fp.read(chunk_size)
+    eof = not buf
+    pos = 0
+
+    # Locate the opening bracket
+    while True:
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos < len(buf) or eof:
+            break
+        buf, pos = fp.read(chunk_size), 0
+        eof = not buf
+
+    if pos >= len(buf):
+        return
+    if buf[pos] != '[':
+        # Not an array: fall back to decoding the whole document
+        data = json.loads(buf[pos:] + fp.read())
+        if isinstance(data, list):
+            yield from data
+        else:
+            yield data
+        return
+    pos += 1
+
+    while True:
+        # Skip separators between elements
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ','):
+            pos += 1
+        if pos < len(buf) and buf[pos] == ']':
+            return
+
+        if pos < len(buf):
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # A scalar cut off at the buffer edge still decodes (e.g. "45"
+                # from "4500.0"), so only trust an element once its delimiter arrived
+                if eof or (end < len(buf) and buf[end] in _ARRAY_DELIMITERS):
+                    yield item
+                    pos = end
+                    continue
+            except ValueError:
+                if eof:
+                    raise
+
+        if eof:
+            raise ValueError("Unterminated JSON array")
+
+        # Need more input: drop consumed text and append the next chunk
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+# Raw export fields loaded before normalization (legacy and extended layouts)
+RAW_STREAMING_SCHEMA = {
+    'ts': pl.Utf8,
+    'endTime': pl.Utf8,
+    'master_metadata_track_name': pl.Utf8,
+    'trackName': pl.Utf8,
+    'master_metadata_album_artist_name': pl.Utf8,
+    'artistName': pl.Utf8,
+    'master_metadata_album_album_name': pl.Utf8,
+    'albumName': pl.Utf8,
+    'ms_played': pl.Float64,
+    'msPlayed': pl.Float64,
+    'platform': pl.Utf8,
+    'skipped': pl.Boolean,
+    'shuffle': pl.Boolean,
+    'offline': pl.Boolean,
+    'reason_start': pl.Utf8,
+    'reason_end': pl.Utf8,
+    'conn_country': pl.Utf8,
+}
+
+
+def _coerce_raw_value(value, dtype):
+    """Coerce one raw field to its RAW_STREAMING_SCHEMA type (None when impossible)"""
+    if value is None:
+        return None
+    if isinstance(value, dict) and '$date' in value:
+        value = value['$date']  # Extended JSON timestamps: {"$date": "..."}
+    try:
+        if dtype == pl.Float64:
+            return float(value)
+        if dtype == pl.Boolean:
+            if isinstance(value, str):
+                return value.strip().lower() == 'true'
+            return bool(value)
+        return str(value)
+    except:
+        return None
+
+
+def raw_records_to_frame(records):
+    """Load raw streaming records into a Polars frame with the raw export columns.
+
+    Uses Polars' native dict loader; only a batch with malformed field types
+    falls back to coercing each record in Python.
+    """
+    try:
+        return pl.from_dicts(records, schema=RAW_STREAMING_SCHEMA, strict=False)
+    except Exception:
+        cleaned = [
+            {name: _coerce_raw_value(record.get(name), dtype) for name, dtype in RAW_STREAMING_SCHEMA.items()}
+            for record in records
+        ]
+        return pl.from_dicts(cleaned, schema=RAW_STREAMING_SCHEMA, strict=False)
+
+
+def _non_empty(name):
+    """Column value, treating empty strings like missing values (mirrors ``a or b``)"""
+    return pl.when(pl.col(name).str.len_bytes() > 0).then(pl.col(name))
+
+
+def parse_timestamp(expr):
+    """Parse export timestamp strings into ``Datetime('ms', 'UTC')``; unparseable values become null"""
+    return pl.coalesce([
+        expr.str.strptime(pl.Datetime('ms'), fmt, strict=False) for fmt in TIMESTAMP_FORMATS
+    ]).dt.replace_time_zone('UTC')
+
+
+def timestamp_format(expr):
+    """Index into TIMESTAMP_FORMATS of the first layout that parses each timestamp string (null if none does)"""
+    return pl.coalesce([
+        pl.when(expr.str.strptime(pl.Datetime('ms'), fmt, strict=False).is_not_null()).then(pl.lit(i, dtype=pl.Int8))
+        for i, fmt in enumerate(TIMESTAMP_FORMATS)
+    ])
+
+
+def normalize_streaming_frame(raw):
+    """Vectorized legacy/extended coalescing, truncation and casting.
+
+    Produces the STREAMING_SCHEMA layout from a frame with the raw export
+    columns; timestamps are parsed once here and split into integer keys.
+    """
+    ts = pl.coalesce([_non_empty('ts'), pl.col('endTime')])
+    return raw.lazy().select([
+        pl.coalesce([_non_empty('master_metadata_track_name'), _non_empty('trackName'), pl.lit('Unknown')]).str.slice(0, 100).alias('trackName'),
+        pl.coalesce([_non_empty('master_metadata_album_artist_name'), _non_empty('artistName'), pl.lit('Unknown')]).str.slice(0, 100).alias('artistName'),
+        pl.coalesce([_non_empty('master_metadata_album_album_name'), _non_empty('albumName'), pl.lit('Unknown')]).str.slice(0, 100).alias('albumName'),
+        pl.coalesce([pl.when(pl.col('ms_played') != 0).then(pl.col('ms_played')), pl.col('msPlayed'), pl.lit(0.0)]).alias('msPlayed'),
+        parse_timestamp(ts).alias('ts'),
+        timestamp_format(ts).alias('ts_format'),
+        pl.col('platform').fill_null('Unknown').str.slice(0, 50),
+        pl.col('skipped').fill_null(False),
+        pl.col('shuffle').fill_null(False),
+        pl.col('offline').fill_null(False),
+        pl.col('reason_start').fill_null('Unknown').str.slice(0, 30),
+        pl.col('reason_end').fill_null('Unknown').str.slice(0, 30),
+        pl.col('conn_country').fill_null('Unknown').str.slice(0, 10),
+    ]).with_columns([
+        pl.col('ts').dt.year().cast(pl.Int32).alias('year'),
+        pl.col('ts').dt.month().cast(pl.Int8).alias('month'),
+        pl.col('ts').dt.day().cast(pl.Int8).alias('day'),
+        pl.col('ts').dt.hour().cast(pl.Int8).alias('hour'),
+        pl.col('ts').dt.weekday().cast(pl.Int8).alias('weekday'),
+        pl.col('ts').dt.date().alias('date'),
+    ]).collect()
+
+
+# Normalized playlist membership: one row per (playlist, item)
+PLAYLIST_TRACKS_SCHEMA = {
+    'playlistName': pl.Utf8,
+    'trackName': pl.Utf8,
+    'artistName': pl.Utf8,
+    'albumName': pl.Utf8,
+    'addedDate': pl.Date,
+}
+
+
+def playlist_track_rows(playlist):
+    """Membership rows of one playlist from a Playlist*.json export (non-track items are skipped)"""
+    playlist_name = str(playlist.get('name') or 'Unknown Playlist')[:100]
+    rows = []
+    for item in playlist.get('items') or []:
+        track = (item or {}).get('track') or {}
+        if not track:
+            continue
+        rows.append({
+            'playlistName': playlist_name,
+            'trackName': str(track.get('trackName') or '').strip()[:100],
+            'artistName': str(track.get('artistName') or '').strip()[:100],
+            'albumName': str(track.get('albumName') or '').strip()[:100],
+            'addedDate': item.get('addedDate'),
+        })
+    return rows
+
+
+def playlist_tracks_frame(rows):
+    """Typed playlist membership table from playlist_track_rows output"""
+    if not rows:
+        return pl.DataFrame(schema=PLAYLIST_TRACKS_SCHEMA)
+    raw = pl.DataFrame(rows, schema={**PLAYLIST_TRACKS_SCHEMA, 'addedDate': pl.Utf8})
+    return raw.with_columns(pl.col('addedDate').str.slice(0, 10).str.to_date('%Y-%m-%d', strict=False))
+
+
+def timestamp_metadata(lf):
+    """Where the dataset's play times live and what range they cover, recorded once per build"""
+    ts_dtype = lf.collect_schema().get('ts')
+    if ts_dtype is None:
+        return {'column': None, 'parsed_rows': 0}
+    stats = lf.select([
+        pl.col('ts').count().alias('parsed_rows'),
+        pl.col('ts').null_count().alias('unparsed_rows'),
+        pl.col('ts').min().alias('first'),
+        pl.col('ts').max().alias('last'),
+        pl.struct(['year', 'month']).filter(pl.col('year').is_not_null() & pl.col('month').is_not_null()).n_unique().alias('months'),
+    ]).collect().row(0, named=True)
+    # Rows per detected layout, most common first: a new layout in an export shows up here
+    format_rows = {
+        TIMESTAMP_FORMATS[index]: rows
+        for index, rows in (lf.group_by('ts_format').agg(pl.len().alias('rows'))
+                            .drop_nulls('ts_format')
+                            .sort(['rows', 'ts_format'], descending=[True, False])
+                            .collect().iter_rows())
+    }
+    return {
+        'column': 'ts',
+        'timezone': getattr(ts_dtype, 'time_zone', None),
+        'format': next(iter(format_rows), None),
+        'format_rows': format_rows,
+        'parsed_rows': stats['parsed_rows'],
+        'unparsed_rows': stats['unparsed_rows'],
+        'first': stats['first'].isoformat() if stats['first'] else None,
+        'last': stats['last'].isoformat() if stats['last'] else None,
+        'months': stats['months'],
+    }
+
+
+def streaming_records_to_frame(records):
+    """Normalize an in-memory list of streaming records (json.load path)"""
+    records = [r for r in records if isinstance(r, dict)]
+    if not records:
+        return pl.DataFrame(schema=STREAMING_SCHEMA)
+    return normalize_streaming_frame(raw_records_to_frame(records))
+
+
+def _iter_raw_batches(file_path, batch_size):
+    """Yield ``(elements_read, records, bytes_read)`` for each batch of raw record dicts"""
+    records = []
+    elements = 0
+
+    with open_source(file_path, text=True) as f:
+        for record in iter_json_array(f):
+            elements += 1
+            if isinstance(record, dict):
+                records.append(record)
+
+                if len(records) >= batch_size:
+                    yield elements, records, f.buffer.tell()
+                    records = []
+                    elements = 0
+
+    if elements:
+        yield elements, records, source_size(file_path)
+
+
+def iter_streaming_batches(file_path, batch_size=STREAM_BATCH_RECORDS):
+    """Parse a streaming-history file into DataFrames of at most ``batch_size`` rows.
+
+    Raw records from the incremental parser are buffered per batch and then
+    loaded and normalized column-wise, so peak memory is bounded by the batch
+    size rather than the file size.
+    """
+    for _, records, _ in _iter_raw_batches(file_path, batch_size):
+        if records:
+            yield normalize_streaming_frame(raw_records_to_frame(records))
+
+
+def finalize_streaming_frame(df):
+    """Drop unusable rows and add the derived analysis columns"""
+    return df.filter(pl.col('trackName').str.len_chars() > 0).with_columns([
+        (pl.col('msPlayed') / (1000 * 60)).alias('minutesPlayed'),
+        (pl.col('msPlayed') / (1000 * 60 * 60)).alias('hoursPlayed'),
+        pl.when(pl.col('msPlayed') > 30000).then(pl.lit('Complete')).otherwise(pl.lit('Partial')).alias('playType'),
+        pl.when(pl.col('skipped')).then(pl.lit('Skipped')).otherwise(pl.lit('Completed')).alias('completion'),
+    ] + [
+        (~pl.col(column).str.to_lowercase().is_in(PLACEHOLDER_NAMES)).fill_null(False).alias(valid)
+        for column, valid in VALID_NAME_COLUMNS.items()
+    ])
+
+
+def ingest_streaming_file(file_path, out_dir, batch_size=STREAM_BATCH_RECORDS, write_profile=FRAGMENT_WRITE_PROFILE,
+                          progress=None):
+    """Parse one streaming-history file into parquet parts under ``out_dir``.
+
+    Every record is kept; at most ``batch_size`` records are in memory at a
+    time. ``progress(file, bytes_read, bytes_total, rows_read)`` is called
+    when the file starts and after each batch, and may raise
+    ``IngestCancelled``. Returns the per-file
+    report: rows read from the JSON, rows written to parquet and the part paths.
+    """
+    stem = os.path.splitext(source_name(file_path))[0]
+    report = {'file': source_name(file_path), 'rows_read': 0, 'rows_written': 0, 'parts': []}
+    bytes_total = source_size(file_path)
+    if progress:
+        progress(report['file'], 0, bytes_total, 0)
+
+    for elements, records, bytes_read in _iter_raw_batches(file_path, batch_size):
+        report['rows_read'] += elements
+        if progress:
+            progress(report['file'], bytes_read, bytes_total, report['rows_read'])
+        if not records:
+            continue
+        frame = finalize_streaming_frame(normalize_streaming_frame(raw_records_to_frame(records)))
+        if frame.is_empty():
+            continue
+        part_path = os.path.join(out_dir, f"{stem}-{len(report['parts']):05d}.parquet")
+        write_parquet(frame, part_path, write_profile)
+        report['rows_written'] += len(frame)
+        report['parts'].append(part_path)
+
+    return report
+
+
+def file_fingerprint(file_path):
+    """Fingerprint a source file by name, modification time and size (zip members: name, CRC and size)"""
+    archive, member = split_source(file_path)
+    if member is not None:
+        with zipfile.ZipFile(archive) as zf:
+            info = zf.getinfo(member)
+        return hashlib.md5(f"{member}:{info.CRC}:{info.file_size}".encode()).hexdigest()
+    stat = os.stat(file_path)
+    return hashlib.md5(f"{os.path.basename(file_path)}:{stat.st_mtime}:{stat.st_size}".encode()).hexdigest()
+
+
+def content_hash(file_path):
+    """blake2b of a file's bytes: identical exports hash the same under any name or mtime"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open_source(file_path) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stream_to_temp(src, dest_path, chunk_size=1 << 20):
+    """Copy a binary stream next to ``dest_path`` in fixed-size chunks, hashing as it goes.
+
+    Returns ``(tmp_path, content_hash, size)``; the caller renames the temp
+    file into place (or discards it). The hash matches ``content_hash``.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    tmp_path = f"{dest_path}.tmp-{uuid.uuid4().hex[:8]}"
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+
+def fragment_parts(fragment_dir):
+    """Parquet parts of a built fragment, in write order"""
+    return sorted(glob.glob(os.path.join(fragment_dir, '*.parquet')))
+
+
+def load_fragment_report(fragment_dir):
+    """Per-file ingest report stored alongside a fragment (None if missing)"""
+    try:
+        with open(os.path.join(fragment_dir, 'report.json'), 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def build_fragment(file_path, fragment_dir, batch_size=STREAM_BATCH_RECORDS, write_profile=FRAGMENT_WRITE_PROFILE,
+                   progress=None):
+    """Ingest one streaming-history file into its own fragment directory.
+
+    Parts are written to a private ``<fragment_dir>.tmp-*`` directory and
+    renamed into place once complete, so an interrupted or cancelled build
+    never looks like a finished fragment, and two profiles building the same
+    shared fragment never write into each other's parts.
+    """
+    tmp_dir = f"{fragment_dir}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    try:
+        report = ingest_streaming_file(file_path, tmp_dir, batch_size, write_profile, progress)
+        report = {k: report[k] for k in ('file', 'rows_read', 'rows_written')}
+        with open(os.path.join(tmp_dir, 'report.json'), 'w') as f:
+            json.dump(report, f)
+        shutil.rmtree(fragment_dir, ignore_errors=True)
+        os.replace(tmp_dir, fragment_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return report
+
+
+def _queue_progress(progress_queue):
+    """Worker-side progress callback that forwards each update to the parent process"""
+    def progress(file, bytes_read, bytes_total, rows_read):
+        progress_queue.put((file, bytes_read, bytes_total, rows_read))
+    return progress
+
+
+def _build_fragment_reporting(file_path, fragment_dir, batch_size, progress_queue):
+    """build_fragment in a pool worker, with per-batch progress sent over ``progress_queue``"""
+    return build_fragment(file_path, fragment_dir, batch_size, progress=_queue_progress(progress_queue))
+
+
+def _drain_progress(progress_queue, progress):
+    while True:
+        try:
+            update = progress_queue.get_nowait()
+        except queue.Empty:
+            return
+        progress(*update)
+
+
+def build_fragments(file_paths, fragment_dirs, max_workers=DEFAULT_MAX_WORKERS, batch_size=STREAM_BATCH_RECORDS,
+                    progress=None, poll_seconds=0.5):
+    """Build one fragment per streaming-history file, spread across a process pool.
+
+    Workers write their parts straight to disk and return only the per-file
+    reports, in ``file_paths`` order. Files that fail to parse are reported
+    and skipped. ``max_workers <= 1`` (or a single file) parses in-process.
+
+    ``progress`` (see ``ingest_streaming_file``) is first called for every
+    file with ``rows_read=None`` to register it as queued, then per batch as
+    each file is parsed; pool workers send their updates back over a queue
+    that is drained while waiting, plus a heartbeat every ``poll_seconds``
+    with ``file=None``. Raising ``IngestCancelled`` from it stops the build:
+    queued files are dropped and only complete fragments remain on disk.
+    """
+    jobs = list(zip(file_paths, fragment_dirs))
+    if not jobs:
+        return []
+    if progress:
+        for path, _ in jobs:
+            progress(source_name(path), 0, source_size(path), None)
+
+    workers = max(1, min(max_workers or 1, len(jobs)))
+    reports = []
+    if workers == 1:
+        for path, fragment_dir in jobs:
+            try:
+                reports.append(build_fragment(path, fragment_dir, batch_size, progress=progress))
+            except IngestCancelled:
+                raise
+            except Exception as e:
+                print(f"❌ Error processing {source_name(path)}: {e}")
+        return reports
+
+    # spawn, not fork: forking a process that already runs Polars' thread pool can deadlock
+    context = multiprocessing.get_context('spawn')
+    manager = context.Manager() if progress else None
+    progress_queue = manager.Queue() if manager else None
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    try:
+        if progress_queue is not None:
+            futures = [pool.submit(_build_fragment_reporting, path, fragment_dir, batch_size, progress_queue)
+                       for path, fragment_dir in jobs]
+        else:
+            futures = [pool.submit(build_fragment, path, fragment_dir, batch_size) for path, fragment_dir in jobs]
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+            if not progress:
+                continue
+            progress(None, 0, 0, 0)
+            _drain_progress(progress_queue, progress)
+            for (path, _), future in zip(jobs, futures):
+                if future in finished and not future.exception():
+                    # The last batch may stop short of the closing bracket: mark the file complete
+                    size = source_size(path)
+                    progress(source_name(path), size, size, future.result()['rows_read'])
+        for (path, _), future in zip(jobs, futures):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                print(f"❌ Error processing {source_name(path)}: {e}")
+    finally:
+        # On cancel, files already being parsed finish (into their .tmp dirs); queued ones never start
+        pool.shutdown(wait=True, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+    return reports
+
+
+def enable_string_cache():
+    """Share one string cache across Categorical columns (implicit since Polars 1.32)"""
+    if not hasattr(pl, 'Categories'):
+        pl.enable_string_cache()
+
+
+def _categorize(lf, categorical_columns):
+    return lf.with_columns([pl.col(c).cast(pl.Categorical) for c in categorical_columns]) if categorical_columns else lf
+
+
+def assemble_parquet(part_paths, out_path, categorical_columns=(), write_profile=None):
+    """Concatenate parquet parts into ``out_path`` using the streaming engine.
+
+    ``categorical_columns`` are converted to ``pl.Categorical``. Writes to a
+    temporary file first so a failure never leaves a partial ``out_path``
+    behind. Returns the number of rows written.
+    """
+    enable_string_cache()
+    tmp_path = out_path + '.tmp'
+    try:
+        sink_parquet(_categorize(pl.scan_parquet(list(part_paths)), categorical_columns), tmp_path, write_profile)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return pl.scan_parquet(out_path).select(pl.len()).collect().item()
+
+
+# Hive partition directory used for rows whose year could not be parsed
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+DEFAULT_PARTITION_ROWS = 1000000
+
+
+def _replace_dir(tmp_dir, final_dir):
+    """Swap a freshly written directory into place"""
+    old_dir = final_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(final_dir):
+        os.replace(final_dir, old_dir)
+    os.replace(tmp_dir, final_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def assemble_partitioned_dataset(part_paths, dataset_dir, partition_col='year', categorical_columns=(),
+                                 partition_rows=DEFAULT_PARTITION_ROWS, sort_by='ts', write_profile=None):
+    """Write parquet parts as a hive-style dataset: ``<dataset_dir>/<col>=<value>/part-NNNNN.parquet``.
+
+    Each partition is sorted once by ``sort_by`` (so row-group min/max
+    statistics stay tight and range filters skip whole row groups) and split
+    into files of at most ``partition_rows`` rows. The partition column lives
+    in the directory names only. The dataset is built next to ``dataset_dir`` and
+    swapped in when complete. Returns the number of rows written.
+    """
+    enable_string_cache()
+    source = _categorize(pl.scan_parquet(list(part_paths)), categorical_columns)
+    counts = source.group_by(partition_col).agg(pl.len().alias('rows')).collect()
+
+    tmp_dir = dataset_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        for value, rows in counts.iter_rows():
+            if value is None:
+                key, predicate = NULL_PARTITION, pl.col(partition_col).is_null()
+            else:
+                key, predicate = value, pl.col(partition_col) == value
+            partition_dir = os.path.join(tmp_dir, f"{partition_col}={key}")
+            os.makedirs(partition_dir)
+            partition = source.filter(predicate).drop(partition_col)
+            if sort_by:
+                # Stable, so rows with equal keys keep part order and every file split is reproducible
+                partition = partition.sort(sort_by, nulls_last=True, maintain_order=True)
+            # One scan and sort per partition; the files are slices of the single result
+            partition = partition.collect()
+            for i, offset in enumerate(range(0, partition.height, max(1, partition_rows))):
+                write_parquet(partition.slice(offset, partition_rows),
+                              os.path.join(partition_dir, f"part-{i:05d}.parquet"), write_profile)
+            del partition
+        _replace_dir(tmp_dir, dataset_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return int(counts['rows'].sum()) if len(counts) else 0
+
+
+def scan_partitioned_dataset(dataset_dir, partition_schema=None):
+    """LazyFrame over a hive-partitioned dataset; filters on the partition column prune whole directories"""
+    enable_string_cache()
+    return pl.scan_parquet(
+        os.path.join(dataset_dir, '**', '*.parquet'),
+        hive_partitioning=True,
+        hive_schema=partition_schema or {'year': pl.Int32},
+    )
+
+
+# CACHE MANIFEST: schema version, source fingerprints and the artifacts built from them
+MANIFEST_VERSION = 1
+_CHECKSUM_CHUNK_BYTES = 1 << 20
+
+
+def _artifact_files(path):
+    """Files making up an artifact (a single file, or every file under a directory), sorted"""
+    if os.path.isdir(path):
+        return sorted(os.path.join(root, f) for root, _, names in os.walk(path) for f in names)
+    return [path] if os.path.exists(path) else []
+
+
+def artifact_bytes(path):
+    """Total on-disk size of an artifact (None if missing)"""
+    files = _artifact_files(path)
+    return sum(os.path.getsize(f) for f in files) if files else None
+
+
+def artifact_checksum(path):
+    """blake2b over the relative paths and contents of an artifact's files"""
+    digest = hashlib.blake2b(digest_size=16)
+    for file in _artifact_files(path):
+        digest.update(os.path.relpath(file, path).encode() + b'\0')
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHECKSUM_CHUNK_BYTES), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    """Read a cache manifest; a missing, unreadable or outdated one comes back empty"""
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('manifest_version') == MANIFEST_VERSION:
+            return manifest
+    except Exception:
+        pass
+    return {'manifest_version': MANIFEST_VERSION, 'sources': {}, 'artifacts': {}}
+
+
+def save_manifest(manifest_path, manifest):
+    """Write a cache manifest atomically"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def artifact_record(path, inputs, version, **extra):
+    """Manifest entry for a freshly written artifact (``path`` None = nothing to write)"""
+    record = {'inputs': dict(inputs), 'version': version, 'path': path, 'bytes': None, 'checksum': None}
+    if path is not None:
+        record.update(bytes=artifact_bytes(path), checksum=artifact_checksum(path))
+    record.update(extra)
+    return record
+
+
+def artifact_is_fresh(record, inputs, version):
+    """True when an artifact was built from exactly ``inputs`` at ``version`` and is still intact on disk.
+
+    Integrity is checked by size; the checksum is kept for audits, since
+    hashing the full dataset on every load would cost more than it saves.
+    """
+    if not record or record.get('version') != version or record.get('inputs') != dict(inputs):
+        return False
+    if record.get('path') is None:
+        return True
+    return artifact_bytes(record['path']) == record.get('bytes')
+
+
+# CONTENT-ADDRESSED FRAGMENT STORE shared by every profile:
+#   <objects_dir>/fragments/v<schema>-<content hash>/   parquet parts + report.json
+#   <objects_dir>/refs/v<schema>-<content hash>/<owner>  one empty marker per referencing profile
+def fragment_key(file_content_hash):
+    """Store key of the fragment built from a file with this content hash"""
+    return f"v{SCHEMA_VERSION}-{file_content_hash}"
+
+
+def fragment_path(objects_dir, key):
+    return os.path.join(objects_dir, 'fragments', key)
+
+
+def add_fragment_ref(objects_dir, key, owner):
+    """Record that ``owner`` (a profile) uses fragment ``key``"""
+    ref_dir = os.path.join(objects_dir, 'refs', key)
+    os.makedirs(ref_dir, exist_ok=True)
+    open(os.path.join(ref_dir, owner), 'a').close()
+
+
+def release_fragment_refs(objects_dir, owner, keep=()):
+    """Drop ``owner``'s references except those in ``keep``; delete fragments nobody references.
+
+    Returns the keys of the fragments that were reclaimed.
+    """
+    refs_root = os.path.join(objects_dir, 'refs')
+    reclaimed = []
+    if not os.path.isdir(refs_root):
+        return reclaimed
+    keep = set(keep)
+    for key in os.listdir(refs_root):
+        ref_dir = os.path.join(refs_root, key)
+        marker = os.path.join(ref_dir, owner)
+        if key in keep or not os.path.exists(marker):
+            continue
+        os.remove(marker)
+        try:
+            os.rmdir(ref_dir)  # Fails while another owner still holds a reference
+        except OSError:
+            continue
+        shutil.rmtree(fragment_path(objects_dir, key), ignore_errors=True)
+        reclaimed.append(key)
+    return reclaimed
+
+
+# AGGREGATE CUBE: plays pre-aggregated to one row per (day, track); panels that
+# only need these dimensions read it instead of the raw play log
+CUBE_DIMENSIONS = ['year', 'month', 'date', 'artistName', 'albumName', 'trackName']
+
+
+def cube_plan(lf):
+    """Minutes (as summed msPlayed), play count and skip count per cube cell"""
+    # Validity flags depend only on the names, so grouping by them adds no cells
+    valid = [c for c in VALID_NAME_COLUMNS.values() if c in lf.collect_schema().names()]
+    return (lf
+            .group_by(CUBE_DIMENSIONS + valid)
+            .agg([
+                pl.col('msPlayed').sum().alias('msPlayed'),
+                pl.len().cast(pl.UInt32).alias('plays'),
+                pl.col('skipped').fill_null(False).sum().cast(pl.UInt32).alias('skips'),
+            ])
+            .sort(['year', 'date'], nulls_last=True))
+
+
+def build_cube(lf, out_path, write_profile=None):
+    """Write the aggregate cube of a play log to ``out_path`` atomically. Returns its row count."""
+    enable_string_cache()
+    tmp_path = out_path + '.tmp'
+    try:
+        sink_parquet(cube_plan(lf), tmp_path, write_profile)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return pl.scan_parquet(out_path).select(pl.len()).collect().item()
+
+
+# Listening sessions: plays separated by less than the gap belong to one session
+DEFAULT_SESSION_GAP_MINUTES = 30
+
+
+def session_plan(lf, gap_minutes=DEFAULT_SESSION_GAP_MINUTES):
+    """One row per listening session, found with a single sort and vectorized diff/cum_sum.
+
+    ``ts`` is when a play ended, so a play started ``msPlayed`` earlier; a new
+    session begins wherever the idle time between the previous play's end and
+    this play's start exceeds ``gap_minutes``.
+    """
+    plays = (lf
+             .select(['ts', 'msPlayed', 'skipped', 'platform'])
+             .filter(pl.col('ts').is_not_null())
+             .sort('ts')
+             .with_columns((pl.col('ts') - pl.duration(milliseconds=pl.col('msPlayed').fill_null(0).cast(pl.Int64))).alias('start')))
+    idle = pl.col('start') - pl.col('ts').shift(1)
+    return (plays
+            .with_columns((idle > pl.duration(minutes=gap_minutes)).fill_null(True).cum_sum().cast(pl.UInt32).alias('session'))
+            .group_by('session', maintain_order=True)
+            .agg([
+                pl.col('start').min().alias('start'),
+                pl.col('ts').max().alias('end'),
+                (pl.col('msPlayed').sum() / (1000 * 60)).alias('minutes'),
+                pl.len().cast(pl.UInt32).alias('tracks'),
+                pl.col('skipped').fill_null(False).sum().cast(pl.UInt32).alias('skips'),
+                pl.col('platform').cast(pl.Utf8).mode().sort().first().alias('platform'),
+            ])
+            .with_columns([
+                ((pl.col('end') - pl.col('start')).dt.total_seconds() / 60).alias('span_minutes'),
+                pl.col('start').dt.hour().cast(pl.Int8).alias('start_hour'),
+                pl.col('start').dt.weekday().cast(pl.Int8).alias('weekday'),
+                pl.col('start').dt.year().cast(pl.Int32).alias('year'),
+            ]))
+
+
+def build_sessions(lf, out_path, gap_minutes=DEFAULT_SESSION_GAP_MINUTES, write_profile=None):
+    """Write the session table of a play log to ``out_path`` atomically. Returns its row count."""
+    tmp_path = out_path + '.tmp'
+    try:
+        sink_parquet(session_plan(lf, gap_minutes), tmp_path, write_profile)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return pl.scan_parquet(out_path).select(pl.len()).collect().item()
+
+
+# Inverted row-id index: name -> sorted ids of the rows holding it, in the indexed table's scan order
+INDEX_COLUMNS = ['artistName', 'albumName', 'trackName']
+
+
+def row_index_plan(lf):
+    """One row per (column, name) with the sorted ids of the rows holding that name"""
+    rows = lf.select(INDEX_COLUMNS).with_row_index('row')
+    return pl.concat([
+        rows
+        .group_by(column)
+        .agg(pl.col('row').sort().alias('rows'))
+        .select([pl.lit(column).alias('column'), pl.col(column).cast(pl.Utf8).alias('name'), 'rows'])
+        for column in INDEX_COLUMNS
+    ]).sort(['column', 'name'])
+
+
+def build_row_index(lf, out_path, write_profile=None):
+    """Write the inverted row-id index of a table to ``out_path`` (atomically). Returns its key count."""
+    index = row_index_plan(lf).collect()
+    write_parquet(index, out_path, write_profile)
+    return index.height
+
+
+def lookup_row_ids(index_path, selections):
+    """Sorted row ids matching every ``{column: names}`` selection (union within a column, intersection across).
+
+    Only the index entries of the selected names are read, so the cost follows
+    the number of matching rows rather than the size of the dataset.
+    """
+    row_ids = None
+    for column, names in selections.items():
+        ids = (pl.scan_parquet(index_path)
+               .filter((pl.col('column') == column) & pl.col('name').is_in([str(n) for n in names]))
+               .select(pl.col('rows').explode())
+               .drop_nulls()
+               .unique()
+               .sort('rows')
+               .collect()
+               .to_series())
+        row_ids = ids if row_ids is None else row_ids.filter(row_ids.is_in(ids))
+        if row_ids.is_empty():
+            break
+    return row_ids
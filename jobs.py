@@ -0,0 +1,145 @@
+"""Background ingestion jobs with per-file progress and cancellation.
+
+A job runs the profile conversion on a daemon thread of the server process,
+so it keeps going across Streamlit reruns and browser refreshes; the heavy
+parsing itself still fans out to ingest's process pool. Every write in the
+pipeline goes to a temporary path and is renamed into place, so a cancelled
+or crashed job leaves the previous cache untouched.
+"""
+import threading
+import time
+import traceback
+import uuid
+
+from ingest import IngestCancelled
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class IngestJob:
+    """Status object shared between the worker thread and the UI that polls it"""
+
+    def __init__(self, profile_name):
+        self.id = uuid.uuid4().hex[:8]
+        self.profile_name = profile_name
+        self.state = QUEUED
+        self.error = None
+        self.result = None
+        self.started_at = None
+        self.finished_at = None
+        self._files = {}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.state in FINISHED_STATES
+
+    def cancel(self):
+        """Ask the job to stop at the next batch or file boundary"""
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise IngestCancelled()
+
+    def file_progress(self, file, bytes_read, bytes_total, records):
+        """Progress callback for ingest.build_fragments; raises IngestCancelled once cancelled"""
+        self.raise_if_cancelled()
+        if file is None:
+            return  # Heartbeat from the process pool
+        now = time.time()
+        with self._lock:
+            entry = self._files.setdefault(file, {
+                'file': file, 'started_at': None, 'bytes_read': 0, 'records': 0, 'records_per_sec': 0.0,
+            })
+            entry['bytes_total'] = bytes_total
+            if records is None:
+                entry['done'] = False  # Registered, still queued
+                return
+            if entry['started_at'] is None:
+                entry['started_at'] = now  # First report comes as the file starts, before any batch
+            elapsed = now - entry['started_at']
+            entry.update({
+                'bytes_read': bytes_read,
+                'records': records,
+                'records_per_sec': records / elapsed if elapsed > 0 else 0.0,
+                'done': bytes_total > 0 and bytes_read >= bytes_total,
+            })
+
+    def status(self):
+        """Snapshot safe to render from another thread"""
+        with self._lock:
+            files = [dict(entry) for entry in self._files.values()]
+        return {
+            'id': self.id,
+            'profile': self.profile_name,
+            'state': self.state,
+            'error': self.error,
+            'elapsed': (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0,
+            'bytes_read': sum(f['bytes_read'] for f in files),
+            'bytes_total': sum(f['bytes_total'] for f in files),
+            'files': files,
+        }
+
+    def run(self, target):
+        """Run ``target(job)`` and record how it ended"""
+        self.state = RUNNING
+        self.started_at = time.time()
+        try:
+            self.raise_if_cancelled()
+            self.result = target(self)
+            self.state = DONE
+        except IngestCancelled:
+            self.state = CANCELLED
+        except Exception as e:
+            self.error = f"{e}"
+            self.state = FAILED
+            traceback.print_exc()
+        finally:
+            self.finished_at = time.time()
+
+
+class JobRegistry:
+    """At most one live ingest job per profile"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, profile_name, target):
+        """Start ``target(job)`` in the background, or return the profile's job if one is still running"""
+        with self._lock:
+            job = self._jobs.get(profile_name)
+            if job is not None and not job.done:
+                return job
+            job = IngestJob(profile_name)
+            self._jobs[profile_name] = job
+        threading.Thread(target=job.run, args=(target,), name=f"ingest-{profile_name}-{job.id}", daemon=True).start()
+        return job
+
+    def get(self, profile_name):
+        with self._lock:
+            return self._jobs.get(profile_name)
+
+    def cancel(self, profile_name):
+        job = self.get(profile_name)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def remove(self, profile_name):
+        """Forget a finished job"""
+        with self._lock:
+            job = self._jobs.get(profile_name)
+            if job is not None and job.done:
+                del self._jobs[profile_name]
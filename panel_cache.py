@@ -0,0 +1,144 @@
+"""Result cache for aggregated dashboard panels.
+
+Entries are keyed by (profile fingerprint, canonical filter state, panel id),
+so toggling back to a filter combination seen before renders without any
+Polars work. A bounded in-memory LRU tier sits in front of an optional Arrow
+IPC tier on disk that survives server restarts. The fingerprint changes
+whenever the profile's dataset is rebuilt, so stale entries are never hit and
+simply age out.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+import polars as pl
+
+
+def canonical_filters(filters):
+    """Order-independent, JSON-stable form of a filter dict (empty filters dropped)"""
+    return json.dumps({k: sorted(str(v) for v in values) for k, values in sorted(filters.items()) if values},
+                      sort_keys=True, separators=(',', ':'))
+
+
+def cache_key(fingerprint, filters, panel):
+    return (fingerprint, canonical_filters(filters), panel)
+
+
+class PanelCache:
+    """Two-tier (memory LRU, optional disk) cache of panel DataFrames"""
+
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_bytes=256 << 20):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, profile_name, key):
+        digest = hashlib.blake2b(json.dumps(key).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.disk_dir, profile_name, f"{digest}.arrow")
+
+    def get(self, profile_name, key):
+        """Cached frame for ``key``, promoting disk hits into memory (None on a miss)"""
+        with self._lock:
+            df = self._entries.get(key)
+            if df is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return df
+        if self.disk_dir:
+            path = self._disk_path(profile_name, key)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'rb') as f:
+                        df = pl.read_ipc(io.BytesIO(f.read()))  # Not memory-mapped, so eviction can delete it
+                    os.utime(path)  # Disk tier evicts by last use
+                    self._remember(key, df, hit=True)
+                    return df
+                except:
+                    pass
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, profile_name, key, df, trim=True):
+        """Store ``df`` in memory and on disk; ``trim=False`` leaves the disk budget to the caller"""
+        self._remember(key, df)
+        if self.disk_dir:
+            path = self._disk_path(profile_name, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+            try:
+                df.write_ipc(tmp_path)
+                os.replace(tmp_path, path)
+            except:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            if trim:
+                self._trim_disk()
+
+    def _remember(self, key, df, hit=False):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            self._entries[key] = df
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _trim_disk(self):
+        """Drop least recently used disk entries beyond ``max_disk_bytes``"""
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith('.arrow'):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                        files.append((st.st_mtime, st.st_size, path))
+                    except OSError:
+                        pass
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def drop_profile(self, profile_name):
+        """Forget a profile's disk entries (memory entries are unreachable once the fingerprint changes)"""
+        if self.disk_dir:
+            shutil.rmtree(os.path.join(self.disk_dir, profile_name), ignore_errors=True)
+
+    def collect(self, profile_name, fingerprint, filters, panels, build_plans, collect_fn):
+        """Frames for every panel id in ``panels``.
+
+        ``build_plans()`` returns the panel LazyFrames and is only called on a
+        miss; the uncached panels are collected together via ``collect_fn``.
+        """
+        if fingerprint is None:
+            return collect_fn({panel: plan for panel, plan in build_plans().items() if panel in panels})
+        results = {}
+        for panel in panels:
+            df = self.get(profile_name, cache_key(fingerprint, filters, panel))
+            if df is not None:
+                results[panel] = df
+        missing = [panel for panel in panels if panel not in results]
+        if missing:
+            plans = build_plans()
+            for panel, df in collect_fn({panel: plans[panel] for panel in missing}).items():
+                self.put(profile_name, cache_key(fingerprint, filters, panel), df, trim=False)
+                results[panel] = df
+            if self.disk_dir:
+                self._trim_disk()  # Once per batch: it walks the whole disk tier
+        return {panel: results[panel] for panel in panels}
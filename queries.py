@@ -0,0 +1,270 @@
+"""Lazy dashboard queries over the profile dataset.
+
+Filters are composed as LazyFrame predicates and every panel describes its
+aggregation as a LazyFrame, so one ``pl.collect_all`` runs them together with
+projection and predicate pushdown into the parquet scan.
+"""
+import polars as pl
+
+from ingest import PLACEHOLDER_NAMES, VALID_NAME_COLUMNS
+
+MS_PER_MINUTE = 1000 * 60
+
+# Entries kept per year by the "Top ... by Year" panels
+TOP_PER_YEAR = 20
+
+# Name columns ranked by the Quick Stats favorites
+NAME_COLUMNS = ['artistName', 'albumName', 'trackName']
+
+# Filters the aggregate cube (ingest.CUBE_DIMENSIONS) can answer
+CUBE_FILTERS = {'years', 'artists', 'albums', 'tracks'}
+
+
+def is_known_name(column):
+    """Expression: True where a name column holds a real (non-placeholder) value"""
+    return ~pl.col(column).cast(pl.Utf8).str.to_lowercase().is_in(PLACEHOLDER_NAMES)
+
+
+def _known_names(keys):
+    return pl.all_horizontal([is_known_name(k) for k in keys])
+
+
+def _valid_flags(lf, keys):
+    """Ingest-time validity columns for ``keys``, or None for data written before they existed"""
+    flags = [VALID_NAME_COLUMNS.get(k) for k in keys]
+    if None in flags or not set(flags) <= set(lf.collect_schema().names()):
+        return None
+    return pl.all_horizontal(flags)
+
+
+def known_rows(lf, keys):
+    """Rows whose ``keys`` all hold real names, via the precomputed flags when the data has them"""
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    flags = _valid_flags(lf, keys)
+    return lf.filter(flags if flags is not None else _known_names(keys))
+
+
+def _minutes():
+    return (pl.col('msPlayed').sum() / MS_PER_MINUTE).alias('totalMinutes')
+
+
+def _valid_year():
+    return pl.col('year').is_not_null() & (pl.col('year') > 1900)
+
+
+def apply_filters(lf, years=None, artists=None, albums=None, tracks=None):
+    """Compose the main-panel filters as lazy predicates (None/empty = no filter)"""
+    if years:
+        lf = lf.filter(pl.col('year').is_in(list(years)))  # Prunes hive partitions
+    if artists:
+        lf = lf.filter(pl.col('artistName').is_in(list(artists)))
+    if albums:
+        lf = lf.filter(pl.col('albumName').is_in(list(albums)))
+    if tracks:
+        lf = lf.filter(pl.col('trackName').is_in(list(tracks)))
+    return lf
+
+
+def is_cube(lf):
+    """True for the aggregate cube, where each row already sums several plays"""
+    return 'plays' in lf.collect_schema().names()
+
+
+def can_use_cube(active_filters):
+    """Whether every active filter is on a cube dimension"""
+    return set(active_filters) <= CUBE_FILTERS
+
+
+def summary_plan(lf):
+    """Row count and distinct counts used by the header metrics and Quick Stats"""
+    return lf.select([
+        (pl.col('plays').sum() if is_cube(lf) else pl.len()).alias('records'),
+        pl.col('year').drop_nulls().n_unique().alias('years'),
+        pl.col('artistName').n_unique().alias('artists'),
+        pl.col('albumName').n_unique().alias('albums'),
+        pl.col('trackName').n_unique().alias('tracks'),
+        pl.col('msPlayed').sum().alias('msPlayed'),
+    ])
+
+
+def quick_stats_plans(lf, n=3):
+    """Quick Stats summary plus the top-``n`` artists, albums and tracks, for one ``collect_all``"""
+    plans = {'summary': summary_plan(lf)}
+    for column, name in zip(NAME_COLUMNS, ['favorite_artists', 'favorite_albums', 'favorite_tracks']):
+        plans[name] = top_plan(lf, column, n)
+    return plans
+
+
+def top_plan(lf, keys, n=None):
+    """Total minutes per key (placeholder names excluded), highest first"""
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    flags = _valid_flags(lf, keys)
+    if flags is not None:
+        plan = lf.filter(flags).group_by(keys).agg(_minutes())
+    else:
+        # Older data: placeholder names are dropped after grouping, checked once per name, not per play
+        plan = lf.group_by(keys).agg(_minutes()).filter(_known_names(keys))
+    plan = plan.sort('totalMinutes', descending=True)
+    return plan.head(n) if n else plan
+
+
+def top_by_year_plan(lf, keys, n=TOP_PER_YEAR):
+    """Top-``n`` keys by minutes within each year, in one windowed pass, each year ordered highest first"""
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    flags = _valid_flags(lf, keys)
+    plan = lf.filter(_valid_year())
+    if flags is not None:
+        plan = plan.filter(flags).group_by(['year'] + keys).agg(_minutes())
+    else:
+        plan = plan.group_by(['year'] + keys).agg(_minutes()).filter(_known_names(keys))
+    return (plan
+            .filter(pl.col('totalMinutes').rank('ordinal', descending=True).over('year') <= n)
+            .sort(['year', 'totalMinutes'], descending=[False, True]))
+
+
+def split_by_year(df):
+    """``{year: rows}`` of a top_by_year_plan result, years ascending"""
+    return {year: part for (year,), part in sorted(df.partition_by('year', as_dict=True, maintain_order=True).items())}
+
+
+def monthly_minutes_plan(lf):
+    """Minutes per calendar month keyed by the first day of the month"""
+    return (lf
+            .filter(pl.col('year').is_not_null() & pl.col('month').is_not_null())
+            .group_by(['year', 'month'])
+            .agg(_minutes())
+            .sort(['year', 'month'])
+            .with_columns(pl.date(pl.col('year'), pl.col('month'), 1).alias('year_month')))
+
+
+def yearly_minutes_plan(lf):
+    """Minutes per year"""
+    return (lf
+            .filter(_valid_year())
+            .group_by('year')
+            .agg(_minutes())
+            .sort('year'))
+
+
+def artist_loyalty_plan(lf, n=20, min_minutes=60):
+    """Listening span and distinct listening days of the top artists"""
+    return (known_rows(lf, 'artistName')
+            .filter(pl.col('date').is_not_null())
+            .group_by('artistName')
+            .agg([
+                pl.col('date').min().alias('first_listen'),
+                pl.col('date').max().alias('last_listen'),
+                _minutes(),
+                pl.col('date').n_unique().alias('unique_days'),
+            ])
+            .with_columns((pl.col('last_listen') - pl.col('first_listen')).dt.total_days().alias('span_days'))
+            .filter(pl.col('totalMinutes') >= min_minutes)
+            .sort('totalMinutes', descending=True)
+            .head(n))
+
+
+def dashboard_plans(lf):
+    """Every center-panel aggregation, keyed by panel id (``lf``: the play log or the aggregate cube)"""
+    return {
+        **quick_stats_plans(lf),
+        'monthly_minutes': monthly_minutes_plan(lf),
+        'yearly_minutes': yearly_minutes_plan(lf),
+        'top_artists': top_plan(lf, 'artistName', 15),
+        'artists_by_year': top_by_year_plan(lf, 'artistName'),
+        'top_tracks': top_plan(lf, ['trackName', 'artistName'], 25),
+        'tracks_by_year': top_by_year_plan(lf, ['trackName', 'artistName']),
+        'top_albums': top_plan(lf, 'albumName', 15),
+        'albums_by_year': top_by_year_plan(lf, 'albumName'),
+        'artist_loyalty': artist_loyalty_plan(lf),
+        'schema': lf.limit(0),  # Columns the panels were computed over, cached with them
+    }
+
+
+def playlist_membership_plan(lf, n=25):
+    """Songs found in more than one playlist, most playlists first, with up to three sample playlist names"""
+    playlists = pl.col('playlistName').unique(maintain_order=True)
+    return (lf
+            .filter(pl.col('trackName').is_not_null() & pl.col('artistName').is_not_null())
+            .filter(_known_names(['trackName', 'artistName']))
+            .group_by(['trackName', 'artistName'])
+            .agg([
+                playlists.len().alias('playlistCount'),
+                (playlists.head(3).str.join(', ')
+                 + pl.when(playlists.len() > 3).then(pl.lit('...')).otherwise(pl.lit(''))).alias('playlists'),
+            ])
+            .filter(pl.col('playlistCount') > 1)
+            .sort(['playlistCount', 'trackName'], descending=[True, False])
+            .head(n)
+            .with_columns((pl.col('trackName') + ' - ' + pl.col('artistName')).alias('song')))
+
+
+def track_key(track='trackName', artist='artistName'):
+    """Expression: case- and whitespace-insensitive (track, artist) join key"""
+    return pl.concat_str([
+        pl.col(track).cast(pl.Utf8).str.strip_chars().str.to_lowercase(),
+        pl.col(artist).cast(pl.Utf8).str.strip_chars().str.to_lowercase(),
+    ], separator='\x1f').alias('track_key')
+
+
+def playlist_minutes_plan(plays_lf, playlist_tracks_lf, n=10):
+    """Minutes actually played of each playlist's tracks, from a hash join with the play log.
+
+    Plays are first reduced to one row per (track, artist), so the key is
+    normalized once per distinct song rather than per play; ``plays_lf`` may
+    be the play log or the aggregate cube. A song counts once per playlist even
+    if the playlist lists it twice.
+    """
+    played = (plays_lf
+              .group_by(['trackName', 'artistName'])
+              .agg(pl.col('msPlayed').sum())
+              .with_columns(track_key())
+              .group_by('track_key')
+              .agg(pl.col('msPlayed').sum()))
+    members = (playlist_tracks_lf
+               .filter(pl.col('trackName').str.len_chars() > 0)
+               .select(['playlistName', track_key()])
+               .unique())
+    return (members
+            .join(played, on='track_key', how='left')
+            .group_by('playlistName')
+            .agg([
+                (pl.col('msPlayed').fill_null(0).sum() / MS_PER_MINUTE).alias('totalMinutes'),
+                pl.len().alias('distinctTracks'),
+                pl.col('msPlayed').is_not_null().sum().alias('playedTracks'),
+            ])
+            .sort(['totalMinutes', 'playlistName'], descending=[True, False])
+            .head(n))
+
+
+def session_plans(lf, n_longest=10):
+    """Listening Sessions panel: headline stats, sessions per start hour and the longest sessions"""
+    return {
+        'session_summary': lf.select([
+            pl.len().alias('sessions'),
+            pl.col('minutes').mean().alias('avg_minutes'),
+            pl.col('minutes').median().alias('median_minutes'),
+            pl.col('tracks').mean().alias('avg_tracks'),
+            (pl.col('skips').sum() / pl.col('tracks').sum()).alias('skip_rate'),
+        ]),
+        'sessions_by_hour': (lf
+                             .group_by('start_hour')
+                             .agg([pl.len().alias('sessions'), pl.col('minutes').mean().alias('avg_minutes')])
+                             .sort('start_hour')),
+        'longest_sessions': (lf
+                             .sort('minutes', descending=True)
+                             .head(n_longest)
+                             .select(['start', 'end', 'minutes', 'tracks', 'skips', 'platform'])),
+    }
+
+
+# Panel ids returned by dashboard_plans
+DASHBOARD_PANELS = ['summary', 'favorite_artists', 'favorite_albums', 'favorite_tracks',
+                    'monthly_minutes', 'yearly_minutes', 'top_artists', 'artists_by_year', 'top_tracks',
+                    'tracks_by_year', 'top_albums', 'albums_by_year', 'artist_loyalty', 'schema']
+
+
+def collect_plans(plans):
+    """Collect a dict of LazyFrames in one pass; shared scans are executed once"""
+    names = list(plans)
+    frames = pl.collect_all([plans[name] for name in names])
+    return dict(zip(names, frames))